@@ -27,7 +27,7 @@ class NodeGraphDialog(QtWidgets.QMainWindow):
         self.setWindowTitle("Node graph -")
 
         # center = self.nodegraph.graph_view.sceneRect().center()
-        cam = self.nodegraph.graph_scene.create_node("camera")
+        cam = self.nodegraph.graph_scene.create_node("camera", type="camera")
         cam.setPos(-200, -150)
         model = self.nodegraph.graph_scene.create_node(
             "combine",
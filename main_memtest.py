@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+"""
+Memory benchmark, reports bytes per node of a scene holding a grid of nodes
+connected in chains.
+
+Usage: main_memtest.py [node count]
+
+Run it on two revisions to compare node and slot representations.
+
+"""
+import sys
+import resource
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from nodegraph.scene import Scene
+
+from Qt import QtWidgets
+
+
+def rss():
+    """Return peak resident memory of the process in bytes
+
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def slot_size(slot):
+    """Return size of a slot object and of its own containers in bytes
+
+    """
+    size = sys.getsizeof(slot)
+    if hasattr(slot, "__dict__"):
+        size += sys.getsizeof(slot.__dict__)
+    if slot._edge or isinstance(slot._edge, set):
+        # The empty set shared by slots without edge isn't accounted
+        size += sys.getsizeof(slot._edge)
+    return size
+
+
+def main(count):
+    app = QtWidgets.QApplication([])
+    scene = Scene()
+    columns = 100
+
+    if tracemalloc:
+        tracemalloc.start()
+    rss_start = rss()
+
+    prev_node = None
+    for i in range(count):
+        node = scene.create_node("node%d" % i, inputs=["in", "add"])
+        node.setPos((i % columns) * 350, (i // columns) * 350)
+        if prev_node and i % columns:
+            scene.create_edge(prev_node._output, node._inputs[0])
+        prev_node = node
+
+    rss_end = rss()
+    if tracemalloc:
+        traced, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    slots = [s for n in scene.nodes for s in n.slots]
+    print("Nodes: %d, slots: %d, edges: %d" %
+          (count, len(slots), len(scene.edges_by_hash)))
+    print("NodeSlot uses __slots__: %s" % (not hasattr(slots[0], "__dict__")))
+    print("Bytes per slot (object only): %.1f" %
+          (float(sum(slot_size(s) for s in slots)) / len(slots)))
+    if tracemalloc:
+        print("Bytes per node (Python heap): %.1f" % (float(traced) / count))
+    print("Bytes per node (peak RSS): %.1f" %
+          (float(rss_end - rss_start) / count))
+    app.quit()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
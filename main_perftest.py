@@ -7,8 +7,10 @@ import random
 # import networkx
 from nodegraph.scene import Scene
 from nodegraph.view import View
+from nodegraph.minimap import Minimap
+from nodegraph.model import GraphModel
 
-from Qt import QtWidgets
+from Qt import QtCore, QtWidgets
 
 
 class NodeGraphDialog(QtWidgets.QMainWindow):
@@ -27,6 +29,20 @@ class NodeGraphDialog(QtWidgets.QMainWindow):
         self.resize(800, 600)
         self.setWindowTitle("Node graph -")
 
+        # Virtualized mode, only items near the view are materialized
+        if "--virtual" in sys.argv:
+            model = GraphModel()
+            self.nodegraph.graph_scene.virtualize(model)
+            for i in range(0, 300):
+                prev_name = None
+                for j in range(0, 400):
+                    name = "random%d_%d" % (i, j)
+                    model.add_node(name, ["in", "add"], j * 350, i * 350)
+                    if prev_name:
+                        model.add_edge(prev_name, name, "in")
+                    prev_name = name
+            return
+
         # center = self.nodegraph.graph_view.sceneRect().center()
         for i in range(0, 30):
             prev_node = None
@@ -58,6 +74,9 @@ class NodeGraphWidget(QtWidgets.QWidget):
         self.graph_view = View(self.graph_scene, parent=self.parent)
         self.horizontal_layout = QtWidgets.QHBoxLayout(self)
         self.horizontal_layout.addWidget(self.graph_view)
+        self.minimap = Minimap(self.graph_view, parent=self, edges=True)
+        self.horizontal_layout.addWidget(self.minimap, 0,
+                                         QtCore.Qt.AlignBottom)
 
 
 if __name__ == "__main__":
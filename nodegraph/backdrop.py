@@ -0,0 +1,182 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Backdrop definition, a frame organizing nodes that moves them as a whole
+
+"""
+
+from Qt import QtCore, QtGui, QtWidgets
+
+from constant import DEBUG, LOD_HIGH
+from .node import Node
+
+
+class BackdropContent(QtWidgets.QGraphicsItem):
+
+    """
+    Invisible parent of the nodes of a backdrop, and of edges between them.
+
+    Children are stacked along with their parent, hence the content is a
+    top-level item of its own, above edges (z -10) and below free nodes
+    (z 0), whereas the frame stays behind everything.
+
+    """
+
+    def __init__(self, backdrop):
+        """Create an instance of this class
+
+        :param backdrop: Backdrop the content belongs to
+        :type backdrop: :class:`nodegraph.backdrop.Backdrop`
+
+        """
+        QtWidgets.QGraphicsItem.__init__(self)
+        self.backdrop = backdrop
+        self.setFlags(QtWidgets.QGraphicsItem.ItemHasNoContents)
+        self.setZValue(-5)
+
+    def boundingRect(self):
+        """Return an empty bounding box, only children are drawn
+
+        """
+        return QtCore.QRectF()
+
+    def paint(self, painter, option, widget=None):
+        """Re-implement paint method
+
+        """
+        pass
+
+
+class Backdrop(QtWidgets.QGraphicsItem):
+
+    """
+    Frame drawn behind nodes.
+
+    Contained nodes, and edges between them, are children of the backdrop
+    content (see :class:`BackdropContent`), which follows the frame, so that
+    moving it is a single transform change. The scene takes care of edges
+    leaving the backdrop and of nodes dropped in or out.
+
+    """
+
+    def __init__(self, name, rect, scene, color=None):
+        """Create an instance of this class
+
+        :param name: Title of the backdrop
+        :type name: str
+
+        :param rect: Scene rectangle covered by the backdrop
+        :type rect: :class:`QtCore.QRectF`
+
+        :param scene: GraphicsScene that holds the backdrop
+        :type scene: :class:`nodegraph.scene.Scene`
+
+        :param color: Color as [red, green, blue]
+        :type color: list
+
+        :returns: An instance of this class
+        :rtype: :class:`nodegraph.backdrop.Backdrop`
+
+        """
+        QtWidgets.QGraphicsItem.__init__(self)
+        scene.addItem(self)
+        self._content = BackdropContent(self)
+        scene.addItem(self._content)
+        self._name = name
+        self._label_height = 34
+        self._outline = 2
+        self._rect = QtCore.QRectF(0, 0, rect.width(), rect.height())
+        self._label_rect = QtCore.QRectF(0, 0, rect.width(),
+                                         self._label_height)
+        color = QtGui.QColor(*(color or [80, 110, 90]))
+        self._label_brush = QtGui.QBrush(color)
+        color.setAlpha(60)
+        self._brush = QtGui.QBrush(color)
+        self._font = QtGui.QFont("Arial", 14)
+        self._font.setStyleStrategy(QtGui.QFont.ForceOutline)
+
+        self.setFlags(QtWidgets.QGraphicsItem.ItemIsMovable |
+                      QtWidgets.QGraphicsItem.ItemIsSelectable |
+                      QtWidgets.QGraphicsItem.ItemSendsGeometryChanges)
+        self.setZValue(-20)
+        self.setPos(rect.topLeft())
+        self._content.setPos(rect.topLeft())
+
+    @property
+    def name(self):
+        """Return title of the backdrop
+
+        """
+        return self._name
+
+    @property
+    def content(self):
+        """Return parent item of contained nodes and edges
+
+        :rtype: :class:`nodegraph.backdrop.BackdropContent`
+
+        """
+        return self._content
+
+    @property
+    def nodes(self):
+        """Return contained nodes
+
+        """
+        return [i for i in self._content.childItems() if isinstance(i, Node)]
+
+    def boundingRect(self):
+        """Return bounding box of the backdrop
+
+        """
+        return self._rect
+
+    def paint(self, painter, option, widget=None):
+        """Re-implement paint method
+
+        """
+        palette = self.scene().palette()
+
+        # Draw frame
+        painter.setBrush(self._brush)
+        if option.state & QtWidgets.QStyle.State_Selected:
+            painter.setPen(QtGui.QPen(palette.highlight(), self._outline))
+        else:
+            painter.setPen(QtCore.Qt.NoPen)
+        painter.drawRect(self._rect)
+
+        # Draw label
+        painter.setBrush(self._label_brush)
+        painter.setPen(QtCore.Qt.NoPen)
+        painter.drawRect(self._label_rect)
+        if self.scene().lod >= LOD_HIGH:
+            painter.setFont(self._font)
+            painter.setPen(QtGui.QPen(palette.text(), 1))
+            painter.drawText(self._label_rect, QtCore.Qt.AlignCenter,
+                             self._name)
+
+        # Draw debug
+        if DEBUG:
+            painter.setBrush(QtGui.QBrush())
+            painter.setPen(QtGui.QColor(255, 0, 0))
+            painter.drawRect(self.boundingRect())
+
+    def itemChange(self, change, value):
+        """Re-implement itemChange to let the scene update contained items
+
+        """
+        if change == QtWidgets.QGraphicsItem.ItemPositionHasChanged:
+            self._content.setPos(self.pos())
+            if self.scene():
+                self.scene().backdrop_moved(self)
+
+        return QtWidgets.QGraphicsItem.itemChange(self, change, value)
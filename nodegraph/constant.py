@@ -19,8 +19,34 @@ SCENE_HEIGHT = 4000000
 
 DEBUG = False
 
+# Level of detail tiers, from the most simplified to the most detailed
+# representation. The view resolves the tier from its scale whenever its
+# transform changes and broadcasts it to the scene items.
+LOD_LOWEST = 0  # Flat node shape only, no slot nor arrow
+LOD_LOW = 1  # Rectangular slots and edge arrows
+LOD_MEDIUM = 2  # Round slots
+LOD_HIGH = 3  # Node label
+LOD_FULL = 4  # Slot labels and edges drawn with their real outline
+
+# Minimum view scale of each tier above LOD_LOWEST
+LOD_THRESHOLDS = [0.15, 0.35, 0.4, 0.5]
+
+# Distance in pixels under which an interactive edge snaps to a slot
+SNAP_RADIUS = 40
+
+# Scale used as reference by each tier to size scale dependent geometry
+LOD_SCALES = [0.1] + LOD_THRESHOLDS
+
+# View scale under which nodes are drawn as a density map instead of items,
+# i.e. instead of the LOD_LOWEST tier
+DENSITY_THRESHOLD = 0.15
+
 NODES_COLOR = {
     "read": {"base_color": [100, 200, 100]},
     "camera": {"base_color": [100, 100, 200]},
-    "merge": {"base_color": [200, 100, 100]}
+    "merge": {"base_color": [200, 100, 100], "dynamic_inputs": True},
+    "group": {"base_color": [120, 120, 120]}
 }
+
+# Type of the nodes holding collapsed sub-graphs
+GROUP_TYPE = "group"
@@ -0,0 +1,280 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Node density map drawn instead of the items at extreme zoom-out
+
+"""
+import math
+
+from Qt import QtCore, QtGui
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class DensityMap(object):
+
+    """
+    2D histogram of node centers rendered as a heatmap image.
+
+    Bins cover the extent of the nodes with a fixed resolution, hence the
+    image and its cluster labels cost the same to draw whatever the number
+    of nodes. Moves only update the two bins involved, the histogram is
+    rebuilt (in a single numpy pass if available) when a node leaves the
+    extent.
+
+    """
+
+    def __init__(self, resolution=128, color=(255, 140, 40)):
+        """Create an instance of this class
+
+        :param resolution: Number of bins along the largest side of the
+            extent
+        :type resolution: int
+
+        :param color: Color of the densest bins as (red, green, blue)
+        :type color: tuple
+
+        """
+        self._resolution = resolution
+        self._color = color
+        self._positions = {}
+        self._bins = {}
+        self._counts = {}
+        self._extent = None
+        self._bin_size = 1.0
+        self._shape = (0, 0)
+        self._is_stale = True
+        self._image = None
+        self._clusters = None
+
+    def __len__(self):
+        """Return number of binned nodes
+
+        """
+        return len(self._positions)
+
+    @property
+    def counts(self):
+        """Return node count of each non empty bin, by (column, row)
+
+        :rtype: dict
+
+        """
+        self._refresh()
+        return self._counts
+
+    @property
+    def shape(self):
+        """Return number of bins as (columns, rows)
+
+        :rtype: tuple
+
+        """
+        self._refresh()
+        return self._shape
+
+    def rect(self):
+        """Return scene rectangle covered by the bins
+
+        :rtype: :class:`QtCore.QRectF`
+
+        """
+        self._refresh()
+        if self._extent is None:
+            return QtCore.QRectF()
+        columns, rows = self._shape
+        return QtCore.QRectF(self._extent[0], self._extent[1],
+                             columns * self._bin_size,
+                             rows * self._bin_size)
+
+    def build(self, positions):
+        """Replace all positions
+
+        :param positions: Node names and centers as (name, x, y)
+        :type positions: iterable
+
+        """
+        self._positions = dict((n, (x, y)) for n, x, y in positions)
+        self._is_stale = True
+
+    def move(self, name, x, y):
+        """Update (or add) position of a node
+
+        :param name: Name of the node
+        :type name: str
+
+        :param x: Scene center of the node
+        :type x: float
+
+        :param y: Scene center of the node
+        :type y: float
+
+        """
+        self._positions[name] = (x, y)
+        if self._is_stale:
+            return
+        key = self._bin(x, y)
+        if key is None:
+            self._is_stale = True
+            return
+        old = self._bins.get(name)
+        if old == key:
+            return
+        if old is not None:
+            self._decrement(old)
+        self._bins[name] = key
+        self._counts[key] = self._counts.get(key, 0) + 1
+        self._image = None
+        self._clusters = None
+
+    def remove(self, name):
+        """Remove a node
+
+        :param name: Name of the node
+        :type name: str
+
+        """
+        if self._positions.pop(name, None) is None:
+            return
+        key = self._bins.pop(name, None)
+        if key is not None and not self._is_stale:
+            self._decrement(key)
+            self._image = None
+            self._clusters = None
+
+    def _decrement(self, key):
+        """Remove a node from a bin
+
+        """
+        count = self._counts[key] - 1
+        if count:
+            self._counts[key] = count
+        else:
+            del self._counts[key]
+
+    def _bin(self, x, y):
+        """Return bin of a position, None if out of the extent
+
+        :rtype: tuple
+
+        """
+        column = int((x - self._extent[0]) // self._bin_size)
+        row = int((y - self._extent[1]) // self._bin_size)
+        if 0 <= column < self._shape[0] and 0 <= row < self._shape[1]:
+            return (column, row)
+        return None
+
+    def _refresh(self):
+        """Rebuild the histogram if a node left the extent
+
+        """
+        if not self._is_stale:
+            return
+        self._is_stale = False
+        self._image = None
+        self._clusters = None
+        self._bins = {}
+        self._counts = {}
+        if not self._positions:
+            self._extent = None
+            self._shape = (0, 0)
+            return
+
+        # Extent with a margin, so that small moves don't trigger a rebuild
+        names = list(self._positions)
+        xs = [p[0] for p in self._positions.values()]
+        ys = [p[1] for p in self._positions.values()]
+        left, top, right, bottom = min(xs), min(ys), max(xs), max(ys)
+        margin = max(right - left, bottom - top, 1.0) * 0.1
+        left -= margin
+        top -= margin
+        size = max(right - left, bottom - top) + margin
+        self._bin_size = size / self._resolution
+        self._extent = (left, top)
+        self._shape = (
+            int(math.ceil((right + margin - left) / self._bin_size)),
+            int(math.ceil((bottom + margin - top) / self._bin_size)))
+
+        if numpy is None:
+            for name, (x, y) in self._positions.items():
+                key = self._bin(x, y)
+                self._bins[name] = key
+                self._counts[key] = self._counts.get(key, 0) + 1
+            return
+
+        columns = numpy.floor((numpy.array(xs) - left) /
+                              self._bin_size).astype(int)
+        rows = numpy.floor((numpy.array(ys) - top) /
+                           self._bin_size).astype(int)
+        columns = numpy.clip(columns, 0, self._shape[0] - 1)
+        rows = numpy.clip(rows, 0, self._shape[1] - 1)
+        histogram = numpy.bincount(rows * self._shape[0] + columns,
+                                   minlength=self._shape[0] * self._shape[1])
+        self._bins = dict(zip(names, zip(columns.tolist(), rows.tolist())))
+        for index in numpy.nonzero(histogram)[0].tolist():
+            self._counts[(index % self._shape[0], index // self._shape[0])] = \
+                int(histogram[index])
+
+    def image(self):
+        """Return heatmap image, one pixel per bin, rendered again only
+        after bins changed
+
+        :returns: An image (or None if there is no node)
+        :rtype: :class:`QtGui.QImage`
+
+        """
+        self._refresh()
+        if self._image is not None or not self._counts:
+            return self._image
+
+        columns, rows = self._shape
+        peak = math.log1p(max(self._counts.values()))
+        red, green, blue = self._color
+        image = QtGui.QImage(columns, rows, QtGui.QImage.Format_ARGB32)
+        image.fill(QtCore.Qt.transparent)
+        for (column, row), count in self._counts.items():
+            alpha = int(55 + 200 * math.log1p(count) / peak)
+            image.setPixel(column, row,
+                           QtGui.qRgba(red, green, blue, alpha))
+        self._image = image
+        return image
+
+    def clusters(self, count=8, block=16):
+        """Return the most populated areas, summing bins by blocks
+
+        :param count: Maximum number of clusters
+        :type count: int
+
+        :param block: Number of bins along a block side
+        :type block: int
+
+        :returns: Scene centers of the blocks and their node counts, densest
+            first
+        :rtype: list
+
+        """
+        self._refresh()
+        if self._clusters is None:
+            blocks = {}
+            for (column, row), value in self._counts.items():
+                key = (column // block, row // block)
+                blocks[key] = blocks.get(key, 0) + value
+            size = block * self._bin_size
+            self._clusters = [
+                (QtCore.QPointF(self._extent[0] + (c + 0.5) * size,
+                                self._extent[1] + (r + 0.5) * size), value)
+                for (c, r), value in sorted(blocks.items(),
+                                            key=lambda i: -i[1])]
+        return self._clusters[:count]
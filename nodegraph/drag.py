@@ -0,0 +1,205 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Transient items used to drag a selection of nodes as a whole:
+
+    * DragGroup
+    * SnapshotDrag
+
+"""
+import math
+
+from Qt import QtCore, QtGui, QtWidgets
+
+from constant import DEBUG
+
+
+class DragGroup(QtWidgets.QGraphicsItem):
+
+    """
+    Transient group that moves nodes and the edges between them with a single
+    transform change.
+
+    Items are temporarily parented to the group. Slot centers of boundary
+    nodes (the ones with edges leaving the group) are updated on every move,
+    hence these edges can be refreshed live. Items get back to the scene when
+    the drag is committed.
+
+    """
+
+    def __init__(self, items, scene, boundary_nodes=None):
+        """Create an instance of this class
+
+        :param items: Nodes and edges to drag
+        :type items: list
+
+        :param scene: GraphicsScene that holds the items
+        :type scene: :class:`nodegraph.scene.Scene`
+
+        :param boundary_nodes: Dragged nodes connected to outside nodes
+        :type boundary_nodes: list
+
+        :returns: An instance of this class
+        :rtype: :class:`nodegraph.drag.DragGroup`
+
+        """
+        QtWidgets.QGraphicsItem.__init__(self)
+        scene.addItem(self)
+        self._items = items
+        self._parents = [i.parentItem() for i in items]
+        self._boundary_nodes = boundary_nodes or []
+        self.setFlag(QtWidgets.QGraphicsItem.ItemHasNoContents)
+
+        # Take items, group lies at scene origin so positions are unchanged
+        for item in items:
+            pos = item.scenePos()
+            item.setParentItem(self)
+            item.setPos(pos)
+
+    def boundingRect(self):
+        """Re-implement bounding box method, the group itself is empty
+
+        """
+        return QtCore.QRectF()
+
+    def paint(self, painter, option, widget=None):
+        """Re-implement paint method, nothing to draw
+
+        """
+        return
+
+    def drag(self, offset):
+        """Move all items by the given offset from their initial position
+
+        :param offset: Offset in scene coordinates
+        :type offset: :class:`QtCore.QPointF`
+
+        """
+        self.setPos(offset)
+        for node in self._boundary_nodes:
+            node.update_slot_centers()
+
+    def commit(self):
+        """Give items back to their parent (scene or backdrop) at their
+        dragged position
+
+        """
+        for item, parent in zip(self._items, self._parents):
+            pos = item.scenePos()
+            item.setParentItem(parent)
+            item.setPos(parent.mapFromScene(pos) if parent else pos)
+        self._items = []
+        self._parents = []
+
+
+class SnapshotDrag(DragGroup):
+
+    """
+    Drag group that draws its items as a single bitmap.
+
+    Items are made fully transparent while dragged so only the snapshot is
+    painted, selection and mouse grab are left untouched.
+
+    """
+
+    MAX_SIZE = 4096
+
+    def __init__(self, items, scene, boundary_nodes=None, scale=1.0):
+        """Create an instance of this class
+
+        :param items: Nodes and edges to drag
+        :type items: list
+
+        :param scene: GraphicsScene that holds the items
+        :type scene: :class:`nodegraph.scene.Scene`
+
+        :param boundary_nodes: Dragged nodes connected to outside nodes
+        :type boundary_nodes: list
+
+        :param scale: Scale of the view, defines the snapshot resolution
+        :type scale: float
+
+        :returns: An instance of this class
+        :rtype: :class:`nodegraph.drag.SnapshotDrag`
+
+        """
+        DragGroup.__init__(self, items, scene, boundary_nodes)
+        self._pixmap = None
+        self.setFlag(QtWidgets.QGraphicsItem.ItemHasNoContents, False)
+
+        self._bbox = self.childrenBoundingRect()
+        self._rasterize(scale)
+
+        # Hide items
+        for item in items:
+            item.setOpacity(0)
+
+    def _rasterize(self, scale):
+        """Paint all items in a single pixmap
+
+        :param scale: Scale of the view
+        :type scale: float
+
+        """
+        rect = self._bbox
+        size = max(rect.width(), rect.height(), 1)
+        scale = min(scale, self.MAX_SIZE / size)
+
+        self._pixmap = QtGui.QPixmap(int(math.ceil(rect.width() * scale)),
+                                     int(math.ceil(rect.height() * scale)))
+        self._pixmap.fill(QtCore.Qt.transparent)
+
+        painter = QtGui.QPainter(self._pixmap)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.scale(scale, scale)
+        painter.translate(-rect.topLeft())
+
+        # Paint edges below nodes
+        option = QtWidgets.QStyleOptionGraphicsItem()
+        for item in sorted(self._items, key=lambda i: i.zValue()):
+            option.state = (QtWidgets.QStyle.State_Selected
+                             if item.isSelected()
+                             else QtWidgets.QStyle.State_None)
+            option.exposedRect = item.boundingRect()
+            painter.save()
+            painter.translate(item.pos())
+            item.paint(painter, option, None)
+            painter.restore()
+
+        painter.end()
+
+    def boundingRect(self):
+        """Return bounding box of all dragged items
+
+        """
+        return self._bbox
+
+    def paint(self, painter, option, widget=None):
+        """Re-implement paint method
+
+        """
+        painter.drawPixmap(self._bbox, self._pixmap,
+                           QtCore.QRectF(self._pixmap.rect()))
+
+        # Draw debug
+        if DEBUG:
+            painter.setBrush(QtGui.QBrush())
+            painter.setPen(QtGui.QColor(255, 0, 0))
+            painter.drawRect(self.boundingRect())
+
+    def commit(self):
+        """Give items back to the scene at their dragged position
+
+        """
+        for item in self._items:
+            item.setOpacity(1)
+        DragGroup.commit(self)
@@ -16,11 +16,16 @@ Edge definition including:
     * InteractiveEdge
 
 """
-import sha
+import hashlib
 from Qt import QtCore, QtGui, QtWidgets
 
-from constant import DEBUG
-from polygons import ARROW_STANDARD, ARROW_SLIM
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from constant import DEBUG, LOD_LOW, LOD_FULL, LOD_SCALES
+from polygons import get_arrow
 from .node import NodeSlot
 
 
@@ -57,28 +62,27 @@ class Edge(QtWidgets.QGraphicsItem):
         :rtype: :class:`nodegraph.edge.Edge`
 
         """
-        QtWidgets.QGraphicsItem.__init__(self, parent=None, scene=scene)
+        QtWidgets.QGraphicsItem.__init__(self)
+        scene.addItem(self)
 
-        self._source_slot = source_slot
-        self._target_slot = target_slot
+        self._source_slot = None
+        self._target_slot = None
         self._outline = outline
         self._arrow = arrow
-        self._lod = 1
-        self._hash = ("%s.%s >> %s.%s" %
-                      (source_slot.parent._name, source_slot._name,
-                       target_slot.parent._name, target_slot._name))
+        self._lod = scene.lod if scene else LOD_FULL
+        self._width = outline
+        self._is_preview = False
+        self._hash = None
         self._shape = None
+        self._norm = None
+        self._bbox = QtCore.QRectF()
         self._line = None
+        self._arrow_poly = None
+        self._coords = None
+        self._pending_line = None
 
-        # Set tooltip
-        self.setToolTip(self._hash)
-
-        # Hash the hash
-        self._hash = sha.sha(self._hash).hexdigest()
-
-        # Reference hash in nodes slot
-        source_slot.add_edge(self._hash)
-        target_slot.add_edge(self._hash)
+        # Connect slots
+        self._connect(source_slot, target_slot)
 
         # Settings
         self.setFlags(QtWidgets.QGraphicsItem.ItemIsSelectable)
@@ -95,6 +99,46 @@ class Edge(QtWidgets.QGraphicsItem):
         """
         return self._hash
 
+    def _connect(self, source_slot, target_slot):
+        """Set slots, resolve hash and reference it in both slots
+
+        """
+        self._source_slot = source_slot
+        self._target_slot = target_slot
+        self._hash = ("%s.%s >> %s.%s" %
+                      (source_slot.parent._name, source_slot._name,
+                       target_slot.parent._name, target_slot._name))
+
+        # Set tooltip
+        self.setToolTip(self._hash)
+
+        # Hash the hash
+        self._hash = hashlib.sha1(self._hash.encode("utf-8")).hexdigest()
+
+        # Reference hash in nodes slot
+        source_slot.add_edge(self._hash)
+        target_slot.add_edge(self._hash)
+
+    def reset(self, source_slot, target_slot):
+        """Re-initialize a released edge between two other slots so that the
+        scene can reuse it (see :class:`nodegraph.pool.ItemPool`)
+
+        :param source_slot: Source slot (should be a output one)
+        :type source_slot: :class:`nodegraph.node.NodeSlot`
+
+        :param target_slot: Target slot (should be an input one)
+        :type target_slot: :class:`nodegraph.node.NodeSlot`
+
+        """
+        self._is_preview = False
+        self.set_lod(self.scene().lod)
+        self.setZValue(-10)
+        self.setOpacity(1)
+        self.setSelected(False)
+        self._connect(source_slot, target_slot)
+        self.prepareGeometryChange()
+        self._update()
+
     def _update_line(self):
         """Resolve start and end point from current source and target position
 
@@ -102,43 +146,105 @@ class Edge(QtWidgets.QGraphicsItem):
         :rtype: :class:`QtCore.QLineF`
 
         """
-        start = QtCore.QPointF(0, 0)
-        end = self._target_slot.center - self._source_slot.center
+        source = self._source_slot
+        target = self._target_slot
 
-        self._line = QtCore.QLineF(start, end)
+        self._line = QtCore.QLineF(0, 0,
+                                   target._cx - source._cx,
+                                   target._cy - source._cy)
+        self._pending_line = None
+
+    def _resolve_line(self):
+        """Build line and normal left as floats by :func:`refresh_edges`,
+        which only resolves what Qt needs right away (position and bounding
+        box)
+
+        """
+        if self._pending_line is not None:
+            ex, ey, nx, ny = self._pending_line
+            self._pending_line = None
+            self._line = QtCore.QLineF(0, 0, ex, ey)
+            self._norm = QtCore.QPointF(nx, ny)
 
-    def _update_path(self):
-        """Build path which drives shape and bounding box
+    def _update_path(self, norm=None):
+        """Resolve bounding box analytically from the line and its normal.
+        The path which drives the shape is only built when requested.
+
+        :param norm: Normal of the line scaled to half the shape width, will
+            be resolved from the line if not provided
+        :type norm: :class:`QtCore.QPointF`
+
+        """
+        if norm is None:
+            norm = self._line.unitVector().normalVector()
+            norm = self._width * 3 * QtCore.QPointF(norm.x2() - norm.x1(),
+                                                    norm.y2() - norm.y1())
+        self._norm = norm
+        self._shape = None
+
+        # Update bounding box
+        nx = abs(norm.x())
+        ny = abs(norm.y())
+        self._bbox = QtCore.QRectF(self._line.p1(), self._line.p2())
+        self._bbox = self._bbox.normalized().adjusted(-nx, -ny, nx, ny)
+
+    def _build_path(self):
+        """Build path which drives shape
 
         :returns: A Qt path object
         :rtype: :class:`QtGui.QPainterPath`
 
         """
-        # Update path
-        width = (1 / self._lod if self._outline * self._lod < 1
-                 else self._outline)
-        norm = self._line.unitVector().normalVector()
-        norm = width * 3 * QtCore.QPointF(norm.x2() - norm.x1(),
-                                          norm.y2() - norm.y1())
-
-        self._shape = QtGui.QPainterPath()
+        self._resolve_line()
+        norm = self._norm
+        path = QtGui.QPainterPath()
         poly = QtGui.QPolygonF([self._line.p1() - norm,
                                 self._line.p1() + norm,
                                 self._line.p2() + norm,
                                 self._line.p2() - norm])
-        self._shape.addPolygon(poly)
-        self._shape.closeSubpath()
+        path.addPolygon(poly)
+        path.closeSubpath()
+        return path
+
+    def _update_arrow(self):
+        """Build arrow polygon at the middle of the line from the shared
+        pre-rotated arrow templates
+
+        """
+        if not self._arrow:
+            return
+
+        self._resolve_line()
+        name = "standard" if self._arrow & self.ARROW_STANDARD else "slim"
+        poly = get_arrow(name, self._line.angle(), self._width)
+        self._arrow_poly = poly.translated(self._line.pointAt(0.5))
 
     def _update_position(self):
-        """Update position to match center of source slot
+        """Update position to match center of source slot, mapped to the
+        backdrop holding the edge if any
+
+        """
+        pos = QtCore.QPointF(self._source_slot._cx, self._source_slot._cy)
+        parent = self.parentItem()
+        self.setPos(parent.mapFromScene(pos) if parent else pos)
+        self._coords = None
+
+    def _update_width(self):
+        """Resolve unit width from current level of detail so that the edge
+        never gets thinner than a pixel
 
         """
-        self.setPos(self._source_slot.center)
+        scale = LOD_SCALES[self._lod]
+        self._width = (1.0 / scale if self._outline * scale < 1
+                       else self._outline)
 
     def _update(self):
         """Update internal properties
 
         """
+        # Update unit width
+        self._update_width()
+
         # Update position
         self._update_position()
 
@@ -148,6 +254,18 @@ class Edge(QtWidgets.QGraphicsItem):
         # Update path
         self._update_path()
 
+        # Update arrow
+        self._update_arrow()
+
+        # Update spatial index
+        self._update_index()
+
+    def _update_index(self):
+        """Update bounding box of the edge in the scene spatial index
+
+        """
+        self.scene().index_edge(self)
+
     def update(self):
         """Re-implement update of QtGraphicsItem
 
@@ -157,30 +275,54 @@ class Edge(QtWidgets.QGraphicsItem):
 
         QtWidgets.QGraphicsLineItem.update(self)
 
+    def set_lod(self, lod):
+        """Switch representation to the given level of detail tier
+
+        :param lod: Level of detail tier as broadcasted by the view
+        :type lod: int
+
+        """
+        if lod == self._lod:
+            return
+
+        self._lod = lod
+        self.prepareGeometryChange()
+        self._resolve_line()
+        self._update_width()
+        self._update_path()
+        self._update_arrow()
+        self._update_index()
+
+    def set_preview(self, value):
+        """Highlight edge as about to be selected
+
+        :param value: Enable or disable highlight
+        :type value: bool
+
+        """
+        if value != self._is_preview:
+            self._is_preview = value
+            QtWidgets.QGraphicsItem.update(self)
+
     def shape(self):
         """Re-implement shape method
         Return a QPainterPath that represents the bounding shape
 
         """
+        if self._shape is None:
+            self._shape = self._build_path()
         return self._shape
 
     def boundingRect(self):
         """Re-implement bounding box method
 
         """
-        # Update node
-        # self._update()
-
-        # Infer bounding box from shape
-        return self._shape.controlPointRect()
+        return self._bbox
 
     def paint(self, painter, option, widget=None):
         """Re-implement paint method
 
         """
-        # Update level of detail
-        self._lod = option.levelOfDetailFromTransform(painter.worldTransform())
-
         # Update brush
         palette = (self.scene().palette() if self.scene()
                    else option.palette)
@@ -190,36 +332,27 @@ class Edge(QtWidgets.QGraphicsItem):
         elif option.state & QtWidgets.QStyle.State_MouseOver:
             color = brush.color().darker(250)
             brush.setColor(color)
+        if self._is_preview:
+            brush = palette.brightText()
 
-        # Update unit width
-        width = (1 / self._lod if self._outline * self._lod < 1
-                 else self._outline)
-
-        # Draw line
-        painter.setPen(QtGui.QPen(brush, width))
+        # Draw line (a cosmetic pen keeps it one pixel wide when zoomed out)
+        width = self._width
+        if width == self._outline:
+            pen = QtGui.QPen(brush, width)
+        else:
+            pen = QtGui.QPen(brush, 1)
+            pen.setCosmetic(True)
+        painter.setPen(pen)
+        self._resolve_line()
         painter.drawLine(self._line)
 
         # Draw arrow if needed
-        if self._arrow and self._lod > 0.15:
-            # Construct arrow
-            matrix = QtGui.QTransform()
-            matrix.rotate(-self._line.angle())
-            matrix.scale(width, width)
-
-            if self._arrow & self.ARROW_STANDARD:
-                poly = matrix.map(ARROW_STANDARD)
-            elif self._arrow & self.ARROW_SLIM:
-                poly = matrix.map(ARROW_SLIM)
-
-            v = self._line.unitVector()
-            v = (self._line.length() / 2) * QtCore.QPointF(v.x2() - v.x1(),
-                                                           v.y2() - v.y1())
-            poly.translate(self._line.x1(), self._line.y1())
-            poly.translate(v.x(), v.y())
-
+        if self._arrow and self._lod >= LOD_LOW:
             painter.setPen(QtCore.Qt.NoPen)
             painter.setBrush(brush)
-            painter.drawPolygon(poly)
+            if self._arrow_poly is None:
+                self._update_arrow()
+            painter.drawPolygon(self._arrow_poly)
 
         # Draw debug
         if DEBUG:
@@ -232,6 +365,16 @@ class Edge(QtWidgets.QGraphicsItem):
 
         return
 
+    def itemChange(self, change, value):
+        """Re-implement itemChange to notify the scene of selection changes
+
+        """
+        if change == QtWidgets.QGraphicsItem.ItemSelectedHasChanged:
+            if self.scene():
+                self.scene().selection_item_changed(self)
+
+        return QtWidgets.QGraphicsItem.itemChange(self, change, value)
+
     def mouseMoveEvent(self, event):
         """Re-implements mouse move event to avoid unecessaries signals
 
@@ -256,11 +399,41 @@ class Edge(QtWidgets.QGraphicsItem):
         self.prepareGeometryChange()
         self.update()
 
+    def _apply_geometry(self, coords, line, bbox):
+        """Apply geometry resolved by :func:`refresh_edges`
+
+        :param coords: Slot centers and width the geometry is resolved from,
+            as (source x, source y, target x, target y, width)
+        :type coords: tuple
+
+        :param line: End of the line relative to the source and normal of the
+            line scaled to half the shape width, as (x, y, normal x, normal y)
+        :type line: tuple
+
+        :param bbox: Bounding box of the edge shape
+        :type bbox: :class:`QtCore.QRectF`
+
+        """
+        # Moving and changing the geometry already schedule a repaint. Line
+        # and arrow are built when painted, edges are mostly out of view.
+        self.prepareGeometryChange()
+        parent = self.parentItem()
+        if parent is None:
+            self.setPos(coords[0], coords[1])
+        else:
+            self.setPos(parent.mapFromScene(coords[0], coords[1]))
+        self._pending_line = line
+        self._shape = None
+        self._bbox = bbox
+        self._coords = coords
+        self._arrow_poly = None
+
     def refresh_position(self):
         """Updates start position
 
         """
         self._update_position()
+        self._update_index()
 
     def is_connected_to(self, nodes):
         """For a given list of nodes, check if edge is connected (bo)
@@ -305,15 +478,23 @@ class InteractiveEdge(Edge):
         :rtype: :class:`nodegraph.edge.InteractiveEdge`
 
         """
-        QtWidgets.QGraphicsItem.__init__(self, parent=None, scene=scene)
+        QtWidgets.QGraphicsItem.__init__(self)
+        scene.addItem(self)
 
         self._source_slot = source_slot
         self._mouse_pos = mouse_pos
         self._outline = outline
         self._arrow = arrow
-        self._lod = 1
+        self._lod = scene.lod if scene else LOD_FULL
+        self._width = outline
+        self._is_preview = False
         self._shape = None
+        self._norm = None
+        self._bbox = QtCore.QRectF()
         self._line = None
+        self._arrow_poly = None
+        self._coords = None
+        self._pending_line = None
 
         self.setZValue(-10)
 
@@ -332,6 +513,13 @@ class InteractiveEdge(Edge):
 
         self._line = QtCore.QLineF(start, end)
 
+    def _update_index(self):
+        """Re-implement function that updates spatial index, interactive
+        edges aren't indexed
+
+        """
+        return
+
     def _update_position(self):
         """Re-implement function that updates internal container
 
@@ -359,3 +547,80 @@ class InteractiveEdge(Edge):
             self._source_slot = source_slot
         self.prepareGeometryChange()
         self.update()
+
+    def reset(self, source_slot, mouse_pos):
+        """Re-initialize a released interactive edge so that the scene can
+        reuse it (see :class:`nodegraph.pool.ItemPool`)
+
+        :param source_slot: Source slot (output or input)
+        :type source_slot: :class:`nodegraph.node.NodeSlot`
+
+        :param mouse_pos: Scene position of the mouse
+        :type mouse_pos: :class:`QtCore.QPointF`
+
+        """
+        self.set_lod(self.scene().lod)
+        self.refresh(mouse_pos, source_slot)
+
+
+# Minimum number of edges for refresh_edges to go through numpy
+BATCH_MIN = 32
+
+
+def refresh_edges(edges):
+    """Refresh many edges at once
+
+    Edges which slots didn't move since their last refresh are skipped. Slot
+    centers of the others are gathered in arrays so that line vectors,
+    normals and bounding boxes are resolved in a single vectorized pass.
+    Falls back to refreshing edges one by one when numpy isn't available or
+    when there are too few edges to pay off.
+
+    :param edges: Edges to refresh
+    :type edges: list
+
+    """
+    coords = [(e._source_slot._cx, e._source_slot._cy,
+               e._target_slot._cx, e._target_slot._cy, e._width)
+              for e in edges]
+    changed = [i for i, c in enumerate(coords) if c != edges[i]._coords]
+    if len(changed) < len(edges):
+        edges = [edges[i] for i in changed]
+        coords = [coords[i] for i in changed]
+
+    if numpy is None or len(edges) < BATCH_MIN:
+        for edge in edges:
+            edge.refresh()
+        return
+
+    # Lines and normals
+    array = numpy.array(coords, dtype=float)
+    widths = array[:, 4] * 3
+    dx = array[:, 2] - array[:, 0]
+    dy = array[:, 3] - array[:, 1]
+    length = numpy.hypot(dx, dy)
+    length[length == 0] = 1
+    nx = dy / length * widths
+    ny = -dx / length * widths
+
+    # Bounding boxes of shapes
+    anx = numpy.abs(nx)
+    any_ = numpy.abs(ny)
+    left = numpy.minimum(dx, 0) - anx
+    top = numpy.minimum(dy, 0) - any_
+    width = numpy.abs(dx) + 2 * anx
+    height = numpy.abs(dy) + 2 * any_
+
+    # Push
+    lines = zip(dx.tolist(), dy.tolist(), nx.tolist(), ny.tolist())
+    data = zip(edges, coords, lines, left.tolist(), top.tolist(),
+               width.tolist(), height.tolist())
+    for edge, acoords, line, l, t, w, h in data:
+        edge._apply_geometry(acoords, line, QtCore.QRectF(l, t, w, h))
+
+    # Scene bounding boxes, indexed in one go
+    left += array[:, 0]
+    top += array[:, 1]
+    rects = zip(left.tolist(), top.tolist(), (left + width).tolist(),
+                (top + height).tolist())
+    edges[0].scene().index_edges(edges, rects)
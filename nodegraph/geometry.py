@@ -0,0 +1,247 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Node geometry shared by all nodes with an identical layout:
+
+    * NodeGeometry
+    * StackedLayout
+
+"""
+
+from Qt import QtCore
+
+
+class NodeGeometry(object):
+
+    """
+    Immutable local geometry of a node: bounding box, label and slot
+    rectangles, slot centers. Rectangles are shared and must not be modified
+    in place.
+
+    """
+
+    __slots__ = ["bbox", "label_rect", "output", "inputs", "centers"]
+
+    def __init__(self, width, height, count, outline, slot_radius,
+                 label_height):
+        """Create an instance of this class
+
+        :param width: Width of the node
+        :type width: int
+
+        :param height: Height of the node
+        :type height: int
+
+        :param count: Number of input slots
+        :type count: int
+
+        :param outline: Width of the node outline
+        :type outline: int
+
+        :param slot_radius: Radius of a slot
+        :type slot_radius: int
+
+        :param label_height: Height of the label
+        :type label_height: int
+
+        """
+        slot_height = slot_radius * 2 + outline
+        base_y = height / 2 + label_height / 2 + outline / 2
+
+        # Base slot bounding box
+        draw_slot = QtCore.QRectF(0, 0, slot_radius * 2, slot_radius * 2)
+
+        # Output
+        init_y = base_y - slot_height / 2
+        self.output = draw_slot.translated(width - slot_radius, init_y)
+
+        # Inputs
+        init_y = base_y - slot_height * count / 2
+        self.inputs = tuple(
+            draw_slot.translated(-slot_radius, init_y + slot_height * i)
+            for i in range(count))
+
+        # Slot centers, output first
+        self.centers = tuple((r.center().x(), r.center().y())
+                             for r in (self.output,) + self.inputs)
+
+        # Label and bounding box
+        self.label_rect = QtCore.QRectF(outline / 2,
+                                        outline / 2,
+                                        width - outline,
+                                        label_height - outline / 2)
+        self.bbox = QtCore.QRectF(-outline / 2 - slot_radius,
+                                  -outline / 2,
+                                  width + outline + slot_radius * 2,
+                                  height + outline)
+
+
+_geometry_cache = {}
+
+
+def get_geometry(width, height, count, outline, slot_radius, label_height):
+    """Return geometry template of a node layout, built once per layout then
+    shared by all nodes
+
+    :param width: Width of the node
+    :type width: int
+
+    :param height: Height of the node
+    :type height: int
+
+    :param count: Number of input slots
+    :type count: int
+
+    :param outline: Width of the node outline
+    :type outline: int
+
+    :param slot_radius: Radius of a slot
+    :type slot_radius: int
+
+    :param label_height: Height of the label
+    :type label_height: int
+
+    :returns: A cached template
+    :rtype: :class:`nodegraph.geometry.NodeGeometry`
+
+    """
+    key = (width, height, count, outline, slot_radius, label_height)
+    geometry = _geometry_cache.get(key)
+    if geometry is None:
+        geometry = _geometry_cache[key] = NodeGeometry(*key)
+    return geometry
+
+
+class StackedLayout(object):
+
+    """
+    Slot layout of nodes with a variable number of inputs.
+
+    Slots are stacked from the top of the node, below its label, so that
+    appending or removing the last input leaves all other slots in place.
+    Input rectangles and centers are built on demand and shared by all nodes
+    with the same layout. They must not be modified in place.
+
+    """
+
+    def __init__(self, width, outline, slot_radius, label_height):
+        """Create an instance of this class
+
+        :param width: Width of the node
+        :type width: int
+
+        :param outline: Width of the node outline
+        :type outline: int
+
+        :param slot_radius: Radius of a slot
+        :type slot_radius: int
+
+        :param label_height: Height of the label
+        :type label_height: int
+
+        """
+        self._slot_radius = slot_radius
+        self._outline = outline
+        self._slot_height = slot_radius * 2 + outline
+        self._top = label_height + outline
+        self._draw_slot = QtCore.QRectF(0, 0, slot_radius * 2,
+                                        slot_radius * 2)
+        self._inputs = []
+        self._centers = []
+
+        # Output on the first row
+        self.output = self._draw_slot.translated(width - slot_radius,
+                                                 self._top)
+        self.output_center = (self.output.center().x(),
+                              self.output.center().y())
+
+    def _grow(self, index):
+        """Build input rectangles and centers up to the given index
+
+        """
+        for i in range(len(self._inputs), index + 1):
+            rect = self._draw_slot.translated(-self._slot_radius,
+                                              self._top +
+                                              self._slot_height * i)
+            self._inputs.append(rect)
+            self._centers.append((rect.center().x(), rect.center().y()))
+
+    def input(self, index):
+        """Return rectangle of an input slot
+
+        :param index: Index of the input
+        :type index: int
+
+        :rtype: :class:`QtCore.QRectF`
+
+        """
+        if index >= len(self._inputs):
+            self._grow(index)
+        return self._inputs[index]
+
+    def input_center(self, index):
+        """Return center of an input slot
+
+        :param index: Index of the input
+        :type index: int
+
+        :rtype: tuple
+
+        """
+        if index >= len(self._centers):
+            self._grow(index)
+        return self._centers[index]
+
+    def height(self, count, minimum):
+        """Return height of a node with the given number of inputs
+
+        :param count: Number of input slots
+        :type count: int
+
+        :param minimum: Minimum height
+        :type minimum: int
+
+        :rtype: int
+
+        """
+        return max(minimum,
+                   self._top + self._slot_height * count + self._outline)
+
+
+_layout_cache = {}
+
+
+def get_stacked_layout(width, outline, slot_radius, label_height):
+    """Return stacked slot layout, built once per layout then shared by all
+    nodes with a variable number of inputs
+
+    :param width: Width of the node
+    :type width: int
+
+    :param outline: Width of the node outline
+    :type outline: int
+
+    :param slot_radius: Radius of a slot
+    :type slot_radius: int
+
+    :param label_height: Height of the label
+    :type label_height: int
+
+    :returns: A cached layout
+    :rtype: :class:`nodegraph.geometry.StackedLayout`
+
+    """
+    key = (width, outline, slot_radius, label_height)
+    layout = _layout_cache.get(key)
+    if layout is None:
+        layout = _layout_cache[key] = StackedLayout(*key)
+    return layout
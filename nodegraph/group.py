@@ -0,0 +1,94 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Headless content of a group node
+
+"""
+from .model import GraphModel
+
+
+class Subgraph(object):
+
+    """
+    Nodes and edges collapsed into a group node.
+
+    Internal nodes and edges are kept as model records only, hence they are
+    neither part of the scene nor of its spatial index until the group is
+    expanded. Each group input maps to the internal input it replaces, and
+    edges leaving the group map back to their internal source node.
+
+    """
+
+    def __init__(self):
+        """Create an instance of this class
+
+        """
+        self._model = GraphModel()
+        self._inputs = {}
+        self._outputs = {}
+        self.origin = (0.0, 0.0)
+
+    @property
+    def model(self):
+        """Return internal nodes and edges
+
+        :rtype: :class:`nodegraph.model.GraphModel`
+
+        """
+        return self._model
+
+    def add_input(self, name, node, slot):
+        """Map a group input to an internal input
+
+        :param name: Name of the group input
+        :type name: str
+
+        :param node: Name of the internal node
+        :type node: str
+
+        :param slot: Name of the internal input
+        :type slot: str
+
+        """
+        self._inputs[name] = (node, slot)
+
+    def add_output(self, target, target_slot, node):
+        """Map an edge leaving the group to its internal source node
+
+        :param target: Name of the external target node
+        :type target: str
+
+        :param target_slot: Name of the external target input
+        :type target_slot: str
+
+        :param node: Name of the internal source node
+        :type node: str
+
+        """
+        self._outputs[(target, target_slot)] = node
+
+    def input(self, name):
+        """Return internal node and input names replaced by a group input
+
+        :rtype: tuple
+
+        """
+        return self._inputs.get(name)
+
+    def output(self, target, target_slot):
+        """Return name of the internal node an edge leaving the group comes
+        from, or None
+
+        :rtype: str
+
+        """
+        return self._outputs.get((target, target_slot))
@@ -0,0 +1,172 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Overview of the whole graph drawn from the scene density maps
+
+"""
+
+from Qt import QtCore, QtGui, QtWidgets
+
+
+class Minimap(QtWidgets.QWidget):
+
+    """
+    Overview widget of a node graph view.
+
+    Nodes (and optionally edges) are drawn from the density maps maintained
+    by the scene, never by rendering the scene items, into a pixmap rebuilt
+    only when the maps changed. The visible area of the view is drawn on
+    top, clicking or dragging centers the view on the pointed position.
+
+    """
+
+    def __init__(self, view, parent=None, edges=False):
+        """Create an instance of this class
+
+        :param view: View to overview and pan
+        :type view: :class:`nodegraph.view.View`
+
+        :param parent: Parent widget
+        :type parent: :class:`QtWidgets.QWidget`
+
+        :param edges: If true, edge density is drawn under the nodes
+        :type edges: bool
+
+        :returns: An instance of this class
+        :rtype: :class:`nodegraph.minimap.Minimap`
+
+        """
+        QtWidgets.QWidget.__init__(self, parent)
+        self._view = view
+        self._is_edges = edges
+        self._pixmap = None
+        self._size = None
+        self._images = []
+        self._transform = QtGui.QTransform()
+        self.setMinimumSize(120, 80)
+        self.setCursor(QtCore.Qt.PointingHandCursor)
+
+        # Follow view repaints (pan, zoom and scene changes)
+        view.viewport().installEventFilter(self)
+
+    def sizeHint(self):
+        """Return default size of the widget
+
+        """
+        return QtCore.QSize(240, 160)
+
+    def eventFilter(self, obj, event):
+        """Schedule a repaint whenever the view repaints
+
+        """
+        if event.type() == QtCore.QEvent.Paint:
+            self.update()
+        return False
+
+    def _maps(self):
+        """Return density maps to draw, edges first
+
+        :rtype: list
+
+        """
+        scene = self._view.scene()  # alias
+        if self._is_edges:
+            return [scene.edge_density, scene.density]
+        return [scene.density]
+
+    def _update_pixmap(self):
+        """Render density maps again if any of them changed, or if the
+        widget was resized
+
+        """
+        maps = self._maps()
+        images = [m.image() for m in maps]
+        if (self.size() == self._size and
+                all(a is b for a, b in zip(images, self._images))):
+            return
+        self._size = self.size()
+        self._images = images
+
+        # Fit the node extent in the widget
+        rect = maps[-1].rect()
+        self._pixmap = QtGui.QPixmap(self.size())
+        self._pixmap.fill(self._view.scene().backgroundBrush().color())
+        if rect.isNull():
+            self._transform = QtGui.QTransform()
+            return
+        scale = min(self.width() / rect.width(),
+                    self.height() / rect.height())
+        self._transform = QtGui.QTransform.fromTranslate(
+            (self.width() - rect.width() * scale) / 2,
+            (self.height() - rect.height() * scale) / 2)
+        self._transform.scale(scale, scale)
+        self._transform.translate(-rect.left(), -rect.top())
+
+        painter = QtGui.QPainter(self._pixmap)
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+        painter.setTransform(self._transform)
+        for amap, image in zip(maps, images):
+            if image is not None:
+                painter.drawImage(amap.rect(), image)
+        painter.end()
+
+    def paintEvent(self, event):
+        """Re-implement paintEvent from base class
+
+        :param event: Paint event
+        :type event: :class:`QtGui.QPaintEvent`
+
+        """
+        self._update_pixmap()
+        painter = QtGui.QPainter(self)
+        painter.drawPixmap(0, 0, self._pixmap)
+
+        # Visible area of the view
+        view = self._view  # alias
+        visible = view.mapToScene(view.viewport().rect()).boundingRect()
+        painter.setPen(QtGui.QPen(view.scene().palette().highlight(), 1))
+        painter.setBrush(QtCore.Qt.NoBrush)
+        painter.drawRect(self._transform.mapRect(visible))
+        painter.end()
+
+    def _center_view(self, pos):
+        """Center view on the scene position under a widget position
+
+        :param pos: Widget position
+        :type pos: :class:`QtCore.QPoint`
+
+        """
+        inverted, is_invertible = self._transform.inverted()
+        if is_invertible:
+            self._view.center_view(inverted.map(QtCore.QPointF(pos)))
+
+    def mousePressEvent(self, event):
+        """Re-implement mousePressEvent from base class
+
+        :param event: Mouse event
+        :type event: :class:`QtWidgets.QMouseEvent`
+
+        """
+        if event.button() == QtCore.Qt.LeftButton:
+            self._center_view(event.pos())
+        event.accept()
+
+    def mouseMoveEvent(self, event):
+        """Re-implement mouseMoveEvent from base class
+
+        :param event: Mouse event
+        :type event: :class:`QtWidgets.QMouseEvent`
+
+        """
+        if event.buttons() & QtCore.Qt.LeftButton:
+            self._center_view(event.pos())
+        event.accept()
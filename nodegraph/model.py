@@ -0,0 +1,408 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Headless graph model holding nodes and edges without any graphics item:
+
+    * GraphModel
+    * NodeRecord
+    * EdgeRecord
+
+"""
+from .spatial import GridIndex, Bounds
+
+
+class NodeRecord(object):
+
+    """
+    Headless description of a node
+
+    """
+
+    __slots__ = ["name", "inputs", "x", "y", "node_type", "item"]
+
+    def __init__(self, name, inputs, x=0.0, y=0.0, node_type=None):
+        """Create an instance of this class
+
+        :param name: Unique name of the node
+        :type name: str
+
+        :param inputs: Input slot names
+        :type inputs: list
+
+        :param x: Horizontal scene position
+        :type x: float
+
+        :param y: Vertical scene position
+        :type y: float
+
+        :param node_type: Name of a registered node type
+        :type node_type: str
+
+        """
+        self.name = name
+        self.inputs = list(inputs)
+        self.x = x
+        self.y = y
+        self.node_type = node_type
+        self.item = None
+
+
+class EdgeRecord(object):
+
+    """
+    Headless description of an edge, from the output of a source node to a
+    named input of a target node
+
+    """
+
+    __slots__ = ["source", "target", "target_slot", "item"]
+
+    def __init__(self, source, target, target_slot):
+        """Create an instance of this class
+
+        :param source: Name of the source node
+        :type source: str
+
+        :param target: Name of the target node
+        :type target: str
+
+        :param target_slot: Name of the target input slot
+        :type target_slot: str
+
+        """
+        self.source = source
+        self.target = target
+        self.target_slot = target_slot
+        self.item = None
+
+    @property
+    def key(self):
+        """Return unique key of the edge
+
+        """
+        return (self.source, self.target, self.target_slot)
+
+
+class GraphModel(object):
+
+    """
+    Graph of node and edge records with their own spatial index.
+
+    The model holds the whole graph whereas the scene only materializes
+    graphics items for the records close to what the view shows. Records
+    keep a reference to their graphics item while it is materialized.
+
+    Edges are indexed by the rectangle between their nodes. Long edges
+    would fill many cells of the grid, they are kept aside and tested one
+    by one instead.
+
+    """
+
+    # Edges spanning more cells than this along a side are kept out of the
+    # grid
+    LONG_EDGE_CELLS = 4
+
+    def __init__(self, node_size=(180, 140), cell_size=1024):
+        """Create an instance of this class
+
+        :param node_size: Approximate width and height of a node, used to
+            index records that were never materialized
+        :type node_size: tuple
+
+        :param cell_size: Cell size of the spatial index
+        :type cell_size: int
+
+        """
+        self._node_size = node_size
+        self._nodes = {}
+        self._edges = {}
+        self._node_edges = {}
+        self._index = GridIndex(cell_size)
+        self._edge_index = GridIndex(cell_size)
+        self._long_edges = {}
+        self._bounds = Bounds()
+        self._node_observers = []
+        self._edge_observers = []
+
+    def __len__(self):
+        """Return number of nodes
+
+        """
+        return len(self._nodes)
+
+    def __contains__(self, name):
+        """Return True if a node with this name exists
+
+        """
+        return name in self._nodes
+
+    @property
+    def nodes(self):
+        """Return node records by name
+
+        """
+        return self._nodes
+
+    @property
+    def edges(self):
+        """Return edge records by key
+
+        """
+        return self._edges
+
+    @property
+    def bounds(self):
+        """Return bounds of all nodes
+
+        :rtype: :class:`nodegraph.spatial.Bounds`
+
+        """
+        return self._bounds
+
+    def node(self, name):
+        """Return node record or None
+
+        :rtype: :class:`nodegraph.model.NodeRecord`
+
+        """
+        return self._nodes.get(name)
+
+    def node_edges(self, name):
+        """Return edge records connected to a node
+
+        :rtype: set
+
+        """
+        return self._node_edges.get(name, set())
+
+    def add_observer(self, nodes=None, edges=None):
+        """Register objects kept in sync with the records through their
+        ``move(key, x, y)`` and ``remove(key)`` methods, such as
+        :class:`nodegraph.density.DensityMap`. Existing records are sent
+        right away.
+
+        :param nodes: Notified of node centers, by node name
+        :type nodes: object
+
+        :param edges: Notified of edge midpoints, by edge key
+        :type edges: object
+
+        """
+        if nodes is not None:
+            self._node_observers.append(nodes)
+            for record in self._nodes.values():
+                nodes.move(record.name, *self._node_center(record))
+        if edges is not None:
+            self._edge_observers.append(edges)
+            for record in self._edges.values():
+                edges.move(record.key, *self._edge_center(record))
+
+    def _node_rect(self, record):
+        """Return approximate rectangle of a node record
+
+        :rtype: tuple
+
+        """
+        width, height = self._node_size
+        return (record.x, record.y, record.x + width, record.y + height)
+
+    def _node_center(self, record):
+        """Return approximate center of a node record
+
+        :rtype: tuple
+
+        """
+        return (record.x + self._node_size[0] / 2.0,
+                record.y + self._node_size[1] / 2.0)
+
+    def _edge_rect(self, record):
+        """Return approximate rectangle of an edge record
+
+        :rtype: tuple
+
+        """
+        source = self._nodes[record.source]
+        target = self._nodes[record.target]
+        return (min(source.x, target.x), min(source.y, target.y),
+                max(source.x, target.x) + self._node_size[0],
+                max(source.y, target.y) + self._node_size[1])
+
+    def _index_edge(self, record):
+        """Update (or add) an edge record in the grid, or in the long edges
+
+        """
+        left, top, right, bottom = rect = self._edge_rect(record)
+        limit = self.LONG_EDGE_CELLS * self._edge_index.cell_size
+        if right - left > limit or bottom - top > limit:
+            self._edge_index.remove(record)
+            self._long_edges[record] = rect
+        else:
+            self._long_edges.pop(record, None)
+            self._edge_index.update(record, rect)
+
+    def _edge_center(self, record):
+        """Return approximate midpoint of an edge record
+
+        :rtype: tuple
+
+        """
+        source = self._nodes[record.source]
+        target = self._nodes[record.target]
+        return ((source.x + target.x + self._node_size[0]) / 2.0,
+                (source.y + target.y + self._node_size[1]) / 2.0)
+
+    def add_node(self, name, inputs=["in"], x=0.0, y=0.0, node_type=None):
+        """Add a node record
+
+        :param name: Unique name of the node
+        :type name: str
+
+        :param inputs: Input slot names
+        :type inputs: list
+
+        :param node_type: Name of a registered node type
+        :type node_type: str
+
+        :rtype: :class:`nodegraph.model.NodeRecord`
+
+        """
+        record = NodeRecord(name, inputs, x, y, node_type)
+        self._nodes[name] = record
+        self._node_edges[name] = set()
+        rect = self._node_rect(record)
+        self._index.insert(record, rect)
+        self._bounds.update(record, rect)
+        if self._node_observers:
+            cx, cy = self._node_center(record)
+            for observer in self._node_observers:
+                observer.move(name, cx, cy)
+        return record
+
+    def add_edge(self, source, target, target_slot):
+        """Add an edge record, or return the existing one
+
+        :param source: Name of the source node
+        :type source: str
+
+        :param target: Name of the target node
+        :type target: str
+
+        :param target_slot: Name of the target input slot
+        :type target_slot: str
+
+        :rtype: :class:`nodegraph.model.EdgeRecord`
+
+        """
+        key = (source, target, target_slot)
+        if key in self._edges:
+            return self._edges[key]
+
+        record = EdgeRecord(source, target, target_slot)
+        self._edges[key] = record
+        self._node_edges[source].add(record)
+        self._node_edges[target].add(record)
+        self._index_edge(record)
+        if self._edge_observers:
+            x, y = self._edge_center(record)
+            for observer in self._edge_observers:
+                observer.move(key, x, y)
+        return record
+
+    def remove_edge(self, key):
+        """Remove an edge record
+
+        :param key: Edge key as (source, target, target slot)
+        :type key: tuple
+
+        """
+        record = self._edges.pop(key, None)
+        if record is None:
+            return
+        self._node_edges[record.source].discard(record)
+        self._node_edges[record.target].discard(record)
+        self._edge_index.remove(record)
+        self._long_edges.pop(record, None)
+        for observer in self._edge_observers:
+            observer.remove(key)
+
+    def remove_node(self, name):
+        """Remove a node record and its edges
+
+        :param name: Name of the node
+        :type name: str
+
+        """
+        record = self._nodes.pop(name, None)
+        if record is None:
+            return
+        for edge in list(self._node_edges[name]):
+            self.remove_edge(edge.key)
+        del self._node_edges[name]
+        self._index.remove(record)
+        self._bounds.remove(record)
+        for observer in self._node_observers:
+            observer.remove(name)
+
+    def move_node(self, name, x, y):
+        """Update position of a node record
+
+        :param name: Name of the node
+        :type name: str
+
+        :param x: Horizontal scene position
+        :type x: float
+
+        :param y: Vertical scene position
+        :type y: float
+
+        """
+        record = self._nodes[name]
+        if record.x == x and record.y == y:
+            return
+        record.x = x
+        record.y = y
+        rect = self._node_rect(record)
+        self._index.update(record, rect)
+        self._bounds.update(record, rect)
+        if self._node_observers:
+            cx, cy = self._node_center(record)
+            for observer in self._node_observers:
+                observer.move(name, cx, cy)
+        for edge in self._node_edges[name]:
+            self._index_edge(edge)
+            if self._edge_observers:
+                cx, cy = self._edge_center(edge)
+                for observer in self._edge_observers:
+                    observer.move(edge.key, cx, cy)
+
+    def query(self, rect):
+        """Return node records needed to display a scene rectangle, i.e.
+        nodes within it and both ends of edges crossing it
+
+        :param rect: Rectangle as (left, top, right, bottom)
+        :type rect: tuple
+
+        :rtype: set
+
+        """
+        records = self._index.query_rect(rect)
+        nodes = self._nodes  # alias
+        edges = self._edge_index.query_rect(rect)
+        left, top, right, bottom = rect
+        for edge, r in self._long_edges.items():
+            if (r[0] <= right and left <= r[2] and
+                    r[1] <= bottom and top <= r[3]):
+                edges.add(edge)
+        for edge in edges:
+            records.add(nodes[edge.source])
+            records.add(nodes[edge.target])
+        return records
@@ -19,7 +19,12 @@ Base node definition including:
 # import sha
 from Qt import QtCore, QtGui, QtWidgets
 
-from constant import DEBUG
+from constant import DEBUG, LOD_LOW, LOD_MEDIUM, LOD_HIGH, LOD_FULL
+from geometry import get_geometry, get_stacked_layout
+from nodetype import get_node_type
+
+# Shared by all slots without edge
+_NO_EDGE = frozenset()
 
 
 class Node(QtWidgets.QGraphicsItem):
@@ -32,25 +37,42 @@ class Node(QtWidgets.QGraphicsItem):
 
     """
 
-    def __init__(self, name, scene, inputs=["in"], parent=None):
+    # Default size
+    WIDTH = 160
+    HEIGHT = 130
+
+    def __init__(self, name, scene, inputs=["in"], parent=None,
+                 node_type=None):
         """Create an instance of this class
 
+        :param node_type: Type providing colors, fonts and pens, generic type
+            if None
+        :type node_type: :class:`nodegraph.nodetype.NodeType`
+
         """
-        QtWidgets.QGraphicsItem.__init__(self, parent=parent, scene=scene)
+        QtWidgets.QGraphicsItem.__init__(self, parent)
+        if parent is None and scene is not None:
+            scene.addItem(self)
         self._name = name
-        self._width = 160
-        self._height = 130
+        self._type = node_type or get_node_type()
+        self._width = self.WIDTH
+        self._height = self.HEIGHT
+        self._min_height = self.HEIGHT
         self._outline = 6
         self._slot_radius = 10
         self._label_height = 34
-        self._bbox = None  # cache container
-        self._round_slot = None
-        self._rect_slot = None
+        self._bbox = QtCore.QRectF()  # cache container
+        self._geometry = None  # shared template
+        self._centers = None  # local slot centers
         self._hover_slot = False
+        self._is_preview = False
+        self._lod = scene.lod if scene else LOD_FULL
         self.setFlags(QtWidgets.QGraphicsItem.ItemIsMovable |
-                      QtWidgets.QGraphicsItem.ItemIsSelectable)
+                      QtWidgets.QGraphicsItem.ItemIsSelectable |
+                      QtWidgets.QGraphicsItem.ItemSendsGeometryChanges)
 
-        self.setAcceptHoverEvents(False)
+        # Slots are only hoverable when drawn
+        self.setAcceptHoverEvents(self._lod >= LOD_LOW)
 
         # Build output slot
         self._output = NodeSlot("out", self, family=NodeSlot.OUTPUT)
@@ -71,44 +93,273 @@ class Node(QtWidgets.QGraphicsItem):
         """
         return self._name
 
+    @property
+    def node_type(self):
+        """Return type of the node
+
+        :rtype: :class:`nodegraph.nodetype.NodeType`
+
+        """
+        return self._type
+
+    @property
+    def slots(self):
+        """Return output and input slots
+
+        """
+        return [self._output] + self._inputs
+
+    def input(self, name):
+        """Return input slot with the given name, or None
+
+        :rtype: :class:`nodegraph.node.NodeSlot`
+
+        """
+        for aninput in self._inputs:
+            if aninput._name == name:
+                return aninput
+        return None
+
     @property
     def edges(self):
         """Return all hashes of connected edges
 
         """
-        outputs = self._output.edge
-        inputs = list(set([e for i in self._inputs for e in i.edge]))
-        return set(outputs + inputs)
+        edges = set(self._output._edge)
+        for aninput in self._inputs:
+            edges |= aninput._edge
+        return edges
+
+    @property
+    def is_dynamic(self):
+        """Return True if the node has a variable number of inputs
+
+        """
+        return self._type.is_dynamic
 
     def _update(self):
-        """Update slots internal properties
+        """Update slots internal properties from the shared geometry
+        template of the current layout
 
         """
-        slot_height = self._slot_radius * 2 + self._outline
-        base_y = self._height / 2 + self._label_height / 2 + self._outline / 2
+        if self._type.is_dynamic:
+            self._update_stacked()
+            return
 
-        # Update base slot bounding box
-        self._draw_slot = QtCore.QRectF(0,
-                                        0,
-                                        self._slot_radius * 2,
-                                        self._slot_radius * 2)
-        # Update output
-        init_y = base_y - slot_height / 2
-        self._output.rect = QtCore.QRectF(self._draw_slot).translated(
-            self._width - self._slot_radius, init_y)
+        geometry = get_geometry(self._width, self._height, len(self._inputs),
+                                self._outline, self._slot_radius,
+                                self._label_height)
+        self._geometry = geometry
+        self._centers = geometry.centers
 
-        # Update inputs
-        init_y = base_y - slot_height * len(self._inputs) / 2
-        for i, _input in enumerate(self._inputs):
-            self._inputs[i].rect = QtCore.QRectF(self._draw_slot).translated(
-                -self._slot_radius, init_y + slot_height * i)
+        # Update slots
+        self._output._rect = geometry.output
+        for aninput, rect in zip(self._inputs, geometry.inputs):
+            aninput._rect = rect
 
         # Update bounding box
-        self._bbox = QtCore.QRectF(
-            -self._outline / 2 - self._slot_radius,
-            -self._outline / 2,
-            self._width + self._outline + self._slot_radius * 2,
-            self._height + self._outline)
+        self._bbox = geometry.bbox
+
+        # Update slots scene position
+        self.update_slot_centers()
+
+    def _update_stacked(self, first=0):
+        """Update slots of a variable-input node from the given input index.
+        Inputs are stacked from the top, hence inputs before it are left
+        untouched.
+
+        :param first: Index of the first input to lay out
+        :type first: int
+
+        """
+        layout = get_stacked_layout(self._width, self._outline,
+                                    self._slot_radius, self._label_height)
+        count = len(self._inputs)
+
+        # Update height and bounding box
+        self._height = layout.height(count, self._min_height)
+        self._geometry = get_geometry(self._width, self._height, 0,
+                                      self._outline, self._slot_radius,
+                                      self._label_height)
+        self._bbox = self._geometry.bbox
+
+        # Update slots
+        if first == 0:
+            self._output._rect = layout.output
+            self._centers = [layout.output_center]
+        else:
+            del self._centers[first + 1:]
+        for index in range(first, count):
+            self._inputs[index]._rect = layout.input(index)
+            self._centers.append(layout.input_center(index))
+
+        # Update slots scene position
+        self.update_slot_centers(first + 1 if first else 0)
+
+    def set_height(self, height):
+        """Set height of the node. A variable-input node grows beyond it
+        when its inputs don't fit, the height is then only a minimum.
+
+        :param height: New height
+        :type height: int
+
+        """
+        self._min_height = self._height = height
+        self.refresh()
+
+    def add_input(self, name):
+        """Append an input slot
+
+        Inputs of a variable-input node never move when another one is
+        appended, so only the new slot is laid out and indexed. Other nodes
+        are fully refreshed.
+
+        :param name: Name of the input
+        :type name: str
+
+        :rtype: :class:`nodegraph.node.NodeSlot`
+
+        """
+        self.prepareGeometryChange()
+        slot = NodeSlot(name, self)
+        self._inputs.append(slot)
+        if self._type.is_dynamic:
+            self._update_stacked(len(self._inputs) - 1)
+            self.scene().index_node(self, [slot])
+            self.update()
+        else:
+            self.refresh()
+        return slot
+
+    def remove_input(self, slot):
+        """Remove an input slot, connected slots are kept
+
+        Only inputs after the removed one move in a variable-input node,
+        hence only they are laid out, indexed and have their edges refreshed.
+        Other nodes are fully refreshed.
+
+        :param slot: Input to remove
+        :type slot: :class:`nodegraph.node.NodeSlot`
+
+        :returns: True if the input was removed
+        :rtype: bool
+
+        """
+        if slot._edge or slot not in self._inputs:
+            return False
+
+        self.prepareGeometryChange()
+        index = self._inputs.index(slot)
+        del self._inputs[index]
+        if self._hover_slot is slot:
+            self._hover_slot = False
+        scene = self.scene()  # alias
+        scene.unindex_slot(slot)
+
+        if self._type.is_dynamic:
+            self._update_stacked(index)
+            shifted = self._inputs[index:]
+            scene.index_node(self, shifted)
+            for aninput in shifted:
+                for ahash in aninput._edge:
+                    scene.edges_by_hash[ahash].refresh()
+            self.update()
+        else:
+            self.refresh()
+        return True
+
+    def update_dynamic_inputs(self, freed=None):
+        """Keep exactly one free input at the end of a variable-input node,
+        to be called whenever an edge gets connected to or removed from one
+        of its inputs
+
+        :param freed: Input which edge was removed, if any, dropped unless it
+            is the last one
+        :type freed: :class:`nodegraph.node.NodeSlot`
+
+        """
+        if not self._type.is_dynamic:
+            return
+
+        inputs = self._inputs  # alias
+        if freed is not None and freed is not inputs[-1]:
+            self.remove_input(freed)
+
+        if not inputs or inputs[-1]._edge:
+            # Resolve a unique name
+            names = set(i._name for i in inputs)
+            index = len(inputs)
+            while "in%d" % index in names:
+                index += 1
+            self.add_input("in%d" % index)
+            return
+
+        while len(inputs) > 1 and not inputs[-2]._edge:
+            self.remove_input(inputs[-1])
+
+    def reset(self, name, inputs=["in"], node_type=None):
+        """Re-initialize a released node so that the scene can reuse it
+        (see :class:`nodegraph.pool.ItemPool`). Existing slots are renamed
+        rather than rebuilt.
+
+        :param name: New name of the node
+        :type name: str
+
+        :param inputs: New input slot names
+        :type inputs: list
+
+        :param node_type: New type, generic type if None
+        :type node_type: :class:`nodegraph.nodetype.NodeType`
+
+        """
+        self.prepareGeometryChange()
+        self._name = name
+        self._type = node_type or get_node_type()
+        self._width = self.WIDTH
+        self._height = self.HEIGHT
+        self._min_height = self.HEIGHT
+        self._hover_slot = False
+        self._is_preview = False
+        self.set_lod(self.scene().lod)
+
+        # Back to the state of a new node, without notifying the scene of
+        # the position change (the scene indexes the node once reset)
+        self.setFlag(QtWidgets.QGraphicsItem.ItemSendsGeometryChanges, False)
+        self.setPos(0, 0)
+        self.setFlag(QtWidgets.QGraphicsItem.ItemSendsGeometryChanges, True)
+        self.setZValue(0)
+        self.setOpacity(1)
+        self.setSelected(False)
+
+        # Rename or build slots
+        self._output._edge = _NO_EDGE
+        slots = self._inputs[:len(inputs)]
+        for slot, slot_name in zip(slots, inputs):
+            slot._name = slot_name
+            slot._edge = _NO_EDGE
+        for slot_name in inputs[len(slots):]:
+            slots.append(NodeSlot(slot_name, self))
+        self._inputs = slots
+
+        # Update internal containers
+        self._update()
+
+    def update_slot_centers(self, first=0):
+        """Cache center of all slots in scene coordinates
+
+        Must be called whenever the scene position of the node changes,
+        which is done automatically unless it is moved through a parent.
+
+        :param first: Index of the first slot to update, output first
+        :type first: int
+
+        """
+        pos = self.scenePos()
+        x = pos.x()
+        y = pos.y()
+        for slot, center in zip(self.slots[first:], self._centers[first:]):
+            slot._cx = x + center[0]
+            slot._cy = y + center[1]
 
     def _update_hover_slot(self, slot):
         if slot == self._hover_slot:
@@ -119,6 +370,32 @@ class Node(QtWidgets.QGraphicsItem):
 
         self.update()
 
+    def set_lod(self, lod):
+        """Switch representation to the given level of detail tier
+
+        :param lod: Level of detail tier as broadcasted by the view
+        :type lod: int
+
+        """
+        if lod == self._lod:
+            return
+
+        self._lod = lod
+        self.setAcceptHoverEvents(lod >= LOD_LOW)
+        if lod < LOD_LOW:
+            self._hover_slot = False
+
+    def set_preview(self, value):
+        """Highlight node as about to be selected
+
+        :param value: Enable or disable highlight
+        :type value: bool
+
+        """
+        if value != self._is_preview:
+            self._is_preview = value
+            self.update()
+
     def boundingRect(self):
         """Return a QRect that represents the bounding box of the node.
         Here that sould be the bounding box of the primary shape of the node.
@@ -131,51 +408,49 @@ class Node(QtWidgets.QGraphicsItem):
 
         """
         # print("Redraw %s" % self._name)
-        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        lod = self._lod
+
+        node_type = self._type
+        palette = self.scene().palette()
 
-        # Resolve fill, text and outlines brush
-        fill_brush = self.scene().palette().button()
-        text_brush = self.scene().palette().text()
-        if option.state & QtWidgets.QStyle.State_Selected:
-            fill_brush = self.scene().palette().highlight()
-            text_brush = self.scene().palette().highlightedText()
+        # Resolve outline and text pens from state
+        outline_pens, text_pens, slot_pen = node_type.pens(palette,
+                                                           self._outline)
+        selected = bool(option.state & QtWidgets.QStyle.State_Selected)
+        if self._is_preview:
+            outline_pen = outline_pens[2]
+        else:
+            outline_pen = outline_pens[selected]
+        text_pen = text_pens[selected]
 
         # Set brush and pen, then start drawing
-        painter.setBrush(self.scene().palette().buttonText())
-        painter.setPen(QtGui.QPen(fill_brush, self._outline))
+        painter.setBrush(palette.buttonText())
+        painter.setPen(outline_pen)
 
         # Draw primary shape
         painter.drawRect(0, 0, self._width, self._height)
 
         # Draw label background
-        # TODO: Color should be based on node type
-        painter.setBrush(QtGui.QColor(90, 90, 140))
+        painter.setBrush(node_type.label_brush)
         painter.setPen(QtCore.Qt.NoPen)
-        label_rect = QtCore.QRectF(self._outline / 2,
-                                   self._outline / 2,
-                                   self._width - self._outline,
-                                   self._label_height - self._outline / 2)
+        label_rect = self._geometry.label_rect
         painter.drawRect(label_rect)
 
         # Draw text
-        if lod >= 0.4:
-            font = QtGui.QFont("Arial", 14)
-            font.setStyleStrategy(QtGui.QFont.ForceOutline)
-            painter.setFont(font)
-            painter.setPen(QtGui.QPen(text_brush, 1))
-            painter.scale(1, 1)
+        if lod >= LOD_HIGH:
+            painter.setFont(node_type.label_font)
+            painter.setPen(text_pen)
             painter.drawText(label_rect, QtCore.Qt.AlignCenter, self._name)
 
         # Draw slots
-        if lod >= 0.15:
+        if lod >= LOD_LOW:
             # Should be driven by slot type
-            hover_color = QtGui.QColor(90, 90, 140)
-            hover_normal = self.scene().palette().text()
-            self.setAcceptHoverEvents(True)
+            hover_color = node_type.hover_brush
+            hover_normal = palette.text()
             painter.setBrush(hover_normal)
-            painter.setPen(QtGui.QPen(fill_brush, self._outline))
+            painter.setPen(outline_pen)
 
-            if lod >= 0.35:
+            if lod >= LOD_MEDIUM:
                 # Draw output (Ellipse)
                 if self._hover_slot == self._output:
                     # Hover color should be driven by slot type
@@ -202,15 +477,11 @@ class Node(QtWidgets.QGraphicsItem):
                     else:
                         painter.setBrush(hover_normal)
                     painter.drawRect(aninput.rect)
-        else:
-            self.setAcceptHoverEvents(False)
 
         # Draw slot labels
-        if lod >= 0.5:
-            font = QtGui.QFont("Arial", 11)
-            font.setStyleStrategy(QtGui.QFont.ForceOutline)
-            painter.setFont(font)
-            painter.setPen(QtGui.QPen(self.scene().palette().text(), 1))
+        if lod >= LOD_FULL:
+            painter.setFont(node_type.slot_font)
+            painter.setPen(slot_pen)
 
             width = self._width / 2 - self._slot_radius - self._outline
             height = self._slot_radius * 2
@@ -244,6 +515,20 @@ class Node(QtWidgets.QGraphicsItem):
 
         return
 
+    def itemChange(self, change, value):
+        """Re-implement itemChange to keep slot centers up to date and
+        notify the scene of selection changes
+
+        """
+        if change == QtWidgets.QGraphicsItem.ItemPositionHasChanged:
+            self.update_slot_centers()
+            self.scene().index_node(self)
+        elif change == QtWidgets.QGraphicsItem.ItemSelectedHasChanged:
+            if self.scene():
+                self.scene().selection_item_changed(self)
+
+        return QtWidgets.QGraphicsItem.itemChange(self, change, value)
+
     def hoverMoveEvent(self, event):
         """Re-implement Mouse hover move event
 
@@ -353,7 +638,8 @@ class Node(QtWidgets.QGraphicsItem):
         """
         self.prepareGeometryChange()
         self._update()
-        if refresh_edges and self.edges:
+        self.scene().index_node(self)
+        if refresh_edges:
             for ahash in self.edges:
                 self.scene().edges_by_hash[ahash].refresh()
         self.update()
@@ -364,11 +650,16 @@ class NodeSlot(object):
     """
     Base class for edge slot
 
+    Slots are plain objects without instance dictionary, and share an empty
+    set until an edge gets connected, as a big graph holds millions of them
+
     """
 
     INPUT = 0
     OUTPUT = 1
 
+    __slots__ = ["_name", "parent", "_family", "_rect", "_cx", "_cy", "_edge"]
+
     def __init__(self, name, parent, family=None):
         """Instance this class
 
@@ -378,7 +669,9 @@ class NodeSlot(object):
         self.parent = parent
         self._family = family or self.INPUT
         self._rect = None
-        self._edge = set()
+        self._cx = 0.0
+        self._cy = 0.0
+        self._edge = _NO_EDGE
 
     @property
     def name(self):
@@ -413,19 +706,20 @@ class NodeSlot(object):
 
     @property
     def center(self):
-        """Return center point of the slot in scene coordinates
+        """Return center point of the slot in scene coordinates, as cached
+        by the parent node
 
         """
-        return self.parent.mapToScene(self._rect.center())
+        return QtCore.QPointF(self._cx, self._cy)
 
     @property
     def edge(self):
-        """Return hash id of connedcted edge or None
+        """Return hash ids of connected edges
 
-        :rtype: list
+        :rtype: tuple
 
         """
-        return list(self._edge)
+        return tuple(self._edge)
 
     @edge.setter
     def edge(self, value):
@@ -442,6 +736,8 @@ class NodeSlot(object):
         :type value: str or list
 
         """
+        if self._edge is _NO_EDGE:
+            self._edge = set()
         self._edge |= set(value if isinstance(value, list) else [value])
 
     def remove_edge(self, value):
@@ -451,3 +747,5 @@ class NodeSlot(object):
 
         """
         self._edge -= set(value if isinstance(value, list) else [value])
+        if not self._edge:
+            self._edge = _NO_EDGE
@@ -0,0 +1,204 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Registry of node types holding the assets shared by all nodes of a type:
+
+    * NodeType
+    * register_node_type
+    * get_node_type
+
+"""
+
+from Qt import QtGui
+
+from constant import NODES_COLOR
+
+# Name and label color of the generic node type
+DEFAULT_TYPE = "default"
+DEFAULT_COLOR = [90, 90, 140]
+
+
+class NodeType(object):
+
+    """
+    Default inputs, colors, fonts and pens of a node type, built once and
+    shared by all its nodes
+
+    """
+
+    def __init__(self, name, inputs=["in"], color=None, dynamic=False):
+        """Create an instance of this class
+
+        :param name: Name of the type
+        :type name: str
+
+        :param inputs: Default input slot names
+        :type inputs: list
+
+        :param color: Label color as [red, green, blue]
+        :type color: list
+
+        :param dynamic: If true, nodes of this type always keep one free
+            input, adding and removing inputs as edges are connected
+        :type dynamic: bool
+
+        """
+        self._name = name
+        self._inputs = list(inputs)
+        self._is_dynamic = dynamic
+        self._color = QtGui.QColor(*(color or DEFAULT_COLOR))
+        self._label_brush = QtGui.QBrush(self._color)
+        self._hover_brush = QtGui.QBrush(self._color)
+        self._label_font = QtGui.QFont("Arial", 14)
+        self._label_font.setStyleStrategy(QtGui.QFont.ForceOutline)
+        self._slot_font = QtGui.QFont("Arial", 11)
+        self._slot_font.setStyleStrategy(QtGui.QFont.ForceOutline)
+        self._pens_key = None
+        self._pens = None
+
+    @property
+    def name(self):
+        """Return name of the type
+
+        """
+        return self._name
+
+    @property
+    def inputs(self):
+        """Return default input slot names
+
+        """
+        return self._inputs
+
+    @property
+    def is_dynamic(self):
+        """Return True if nodes of this type have a variable number of inputs
+
+        """
+        return self._is_dynamic
+
+    @property
+    def color(self):
+        """Return label color
+
+        """
+        return self._color
+
+    @property
+    def label_brush(self):
+        """Return brush of the label background
+
+        """
+        return self._label_brush
+
+    @property
+    def hover_brush(self):
+        """Return brush of hovered slots
+
+        """
+        return self._hover_brush
+
+    @property
+    def label_font(self):
+        """Return font of the node label
+
+        """
+        return self._label_font
+
+    @property
+    def slot_font(self):
+        """Return font of the slot labels
+
+        """
+        return self._slot_font
+
+    def pens(self, palette, outline):
+        """Return pens resolved from a palette, rebuilt only when the palette
+        or the outline changes
+
+        :param palette: Palette of the scene
+        :type palette: :class:`QtGui.QPalette`
+
+        :param outline: Width of the node outline
+        :type outline: int
+
+        :returns: Outline pens (normal, selected, preview), text pens
+            (normal, selected) and slot label pen
+        :rtype: tuple
+
+        """
+        key = (palette.cacheKey(), outline)
+        if key != self._pens_key:
+            self._pens_key = key
+            self._pens = (
+                (QtGui.QPen(palette.button(), outline),
+                 QtGui.QPen(palette.highlight(), outline),
+                 QtGui.QPen(palette.brightText(), outline)),
+                (QtGui.QPen(palette.text(), 1),
+                 QtGui.QPen(palette.highlightedText(), 1)),
+                QtGui.QPen(palette.text(), 1))
+        return self._pens
+
+
+_registry = {}
+
+
+def _register_defaults():
+    """Register generic type and types defined by
+    :data:`nodegraph.constant.NODES_COLOR`, once and only when first needed
+    (fonts require an application)
+
+    """
+    if _registry:
+        return
+    _registry[DEFAULT_TYPE] = NodeType(DEFAULT_TYPE)
+    for name, settings in NODES_COLOR.items():
+        _registry[name] = NodeType(
+            name,
+            color=settings["base_color"],
+            dynamic=settings.get("dynamic_inputs", False))
+
+
+def register_node_type(name, inputs=["in"], color=None, dynamic=False):
+    """Register (or replace) a node type
+
+    :param name: Name of the type
+    :type name: str
+
+    :param inputs: Default input slot names
+    :type inputs: list
+
+    :param color: Label color as [red, green, blue]
+    :type color: list
+
+    :param dynamic: If true, nodes have a variable number of inputs
+    :type dynamic: bool
+
+    :rtype: :class:`nodegraph.nodetype.NodeType`
+
+    """
+    _register_defaults()
+    node_type = _registry[name] = NodeType(name, inputs, color, dynamic)
+    return node_type
+
+
+def get_node_type(name=None):
+    """Return a registered node type
+
+    :param name: Name of the type, generic type if None
+    :type name: str
+
+    :rtype: :class:`nodegraph.nodetype.NodeType`
+
+    """
+    _register_defaults()
+    return _registry[name or DEFAULT_TYPE]
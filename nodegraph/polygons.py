@@ -17,6 +17,10 @@ Polygons used in Node graph
 from Qt import QtCore, QtGui
 
 
+# Number of pre-rotated arrows per full turn (i.e. 1 degree precision)
+ARROW_ANGLE_BUCKETS = 360
+
+
 height = 4
 width = height * 3 / 4
 thick = height / 2
@@ -32,3 +36,38 @@ ARROW_STANDARD = QtGui.QPolygonF([QtCore.QPointF(height, 0),
                                   QtCore.QPointF(- height, - width),
                                   QtCore.QPointF(- height, width),
                                   QtCore.QPointF(height, 0)])
+
+ARROWS = {"standard": ARROW_STANDARD, "slim": ARROW_SLIM}
+
+_arrow_cache = {}
+
+
+def get_arrow(name, angle, scale):
+    """Return arrow polygon rotated and scaled around its origin
+
+    Polygons are built once per angle bucket and scale, then shared by all
+    edges. The returned polygon must not be modified in place.
+
+    :param name: Arrow name ("standard" or "slim")
+    :type name: str
+
+    :param angle: Angle of the arrow in degrees, counter clockwise
+    :type angle: float
+
+    :param scale: Uniform scale applied to the arrow
+    :type scale: float
+
+    :returns: A cached polygon
+    :rtype: :class:`QtGui.QPolygonF`
+
+    """
+    bucket = int(round(angle * ARROW_ANGLE_BUCKETS / 360.0))
+    bucket %= ARROW_ANGLE_BUCKETS
+    key = (name, bucket, scale)
+    poly = _arrow_cache.get(key)
+    if poly is None:
+        matrix = QtGui.QTransform()
+        matrix.rotate(-bucket * 360.0 / ARROW_ANGLE_BUCKETS)
+        matrix.scale(scale, scale)
+        poly = _arrow_cache[key] = matrix.map(ARROWS[name])
+    return poly
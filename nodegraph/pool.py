@@ -0,0 +1,120 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Pool of released graphics items, reset and reused by the scene instead of
+constructing new ones
+
+"""
+
+
+class ItemPool(object):
+
+    """
+    Keeps released graphics items hidden in their scene, by exact type.
+
+    Pooled items stay in the scene, hence reusing one neither allocates a new
+    item nor adds it to the scene again. Callers reset acquired items (they
+    are returned hidden) then show them. Items released over the limit are
+    removed from the scene.
+
+    """
+
+    def __init__(self, limit=4096):
+        """Create an instance of this class
+
+        :param limit: Maximum number of pooled items per type
+        :type limit: int
+
+        """
+        self._limit = limit
+        self._items = {}
+        self._created = 0
+        self._reused = 0
+        self._released = 0
+        self._dropped = 0
+
+    def __len__(self):
+        """Return number of pooled items
+
+        """
+        return sum(len(items) for items in self._items.values())
+
+    def acquire(self, cls):
+        """Return a pooled item of the given type, still hidden
+
+        :param cls: Exact type of the item
+        :type cls: type
+
+        :returns: A released item or None if the caller must construct a new
+            one (which is accounted as a creation)
+        :rtype: :class:`QtWidgets.QGraphicsItem`
+
+        """
+        items = self._items.get(cls)
+        if items:
+            self._reused += 1
+            return items.pop()
+        self._created += 1
+        return None
+
+    def release(self, item):
+        """Hide an item and keep it for reuse
+
+        :param item: Graphics item no longer used by the scene
+        :type item: :class:`QtWidgets.QGraphicsItem`
+
+        :returns: False if the pool is full and the item was removed from its
+            scene instead
+        :rtype: bool
+
+        """
+        self._released += 1
+        items = self._items.setdefault(type(item), [])
+        if len(items) >= self._limit:
+            self._dropped += 1
+            if item.scene():
+                item.scene().removeItem(item)
+            return False
+
+        item.setVisible(False)
+        items.append(item)
+        return True
+
+    def clear(self):
+        """Remove all pooled items from their scene
+
+        """
+        for items in self._items.values():
+            for item in items:
+                if item.scene():
+                    item.scene().removeItem(item)
+        self._items.clear()
+
+    @property
+    def stats(self):
+        """Return reuse statistics
+
+        :returns: Number of items acquired, reused, created, released,
+            dropped and currently pooled, and the reuse rate
+        :rtype: dict
+
+        """
+        acquired = self._created + self._reused
+        return {
+            "acquired": acquired,
+            "reused": self._reused,
+            "created": self._created,
+            "released": self._released,
+            "dropped": self._dropped,
+            "pooled": len(self),
+            "reuse_rate": (float(self._reused) / acquired
+                           if acquired else 0.0)}
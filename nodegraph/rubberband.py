@@ -16,16 +16,51 @@ default one with a large numbers of items
 """
 
 from Qt import QtCore, QtGui, QtWidgets
+
+from .spatial import points_in_polygon
 # from .node import Node
 # from .edge import Edge
 
 # from constant import DEBUG
 
 
+def _subtract(rect, other):
+    """Return parts of a rectangle not covered by another one
+
+    :param rect: Rectangle as (left, top, right, bottom)
+    :type rect: tuple
+
+    :param other: Rectangle as (left, top, right, bottom)
+    :type other: tuple
+
+    :returns: Up to four rectangles
+    :rtype: list
+
+    """
+    left, top, right, bottom = rect
+    o_left, o_top, o_right, o_bottom = other
+    if (o_left > right or o_right < left or
+            o_top > bottom or o_bottom < top):
+        return [rect]
+
+    strips = []
+    if top < o_top:
+        strips.append((left, top, right, o_top))
+    if o_bottom < bottom:
+        strips.append((left, o_bottom, right, bottom))
+    middle_top = max(top, o_top)
+    middle_bottom = min(bottom, o_bottom)
+    if left < o_left:
+        strips.append((left, middle_top, o_left, middle_bottom))
+    if o_right < right:
+        strips.append((o_right, middle_top, right, middle_bottom))
+    return strips
+
+
 class RubberBand(QtWidgets.QGraphicsItem):
 
     """
-    Draw outline of a rectangle (as a shape)
+    Draw outline of a rectangle or of a freehand lasso (as a shape)
 
     """
 
@@ -34,7 +69,7 @@ class RubberBand(QtWidgets.QGraphicsItem):
     MINUS_SELECTION = 4
     TOGGLE_SELECTION = 8
 
-    def __init__(self, init_pos, scene, outline=2):
+    def __init__(self, init_pos, scene, outline=2, lasso=False):
         """Creates an instance of this class
 
         :param init_pos: Point of origin of the rubber band
@@ -46,17 +81,25 @@ class RubberBand(QtWidgets.QGraphicsItem):
         :param outline: Width of the edge and arrow outline
         :type outline: int
 
+        :param lasso: If true, the shape is drawn freehand by the mouse
+        :type lasso: bool
+
         :returns: An instance of this class
         :rtype: :class:`nodegraph.rubberband.RubberBand`
 
         """
-        QtWidgets.QGraphicsItem.__init__(self, parent=None, scene=scene)
+        QtWidgets.QGraphicsItem.__init__(self)
+        scene.addItem(self)
 
         self._source_pos = init_pos
         self._mouse_pos = init_pos
         self._outline = outline
         self._shape = None
         self._selection_mode = self.REPLACE_SELECTION
+        self._preview = set()
+        self._preview_rect = None
+        self._is_lasso = lasso
+        self._points = [init_pos]
 
         # Settings
         self.setZValue(10)
@@ -70,12 +113,15 @@ class RubberBand(QtWidgets.QGraphicsItem):
         """
         # Update path
         self._shape = QtGui.QPainterPath()
-        poly = QtGui.QPolygonF([
-            self._source_pos,
-            QtCore.QPointF(self._mouse_pos.x(), self._source_pos.y()),
-            self._mouse_pos,
-            QtCore.QPoint(self._source_pos.x(), self._mouse_pos.y())
-        ])
+        if self._is_lasso:
+            poly = QtGui.QPolygonF(self._points)
+        else:
+            poly = QtGui.QPolygonF([
+                self._source_pos,
+                QtCore.QPointF(self._mouse_pos.x(), self._source_pos.y()),
+                self._mouse_pos,
+                QtCore.QPoint(self._source_pos.x(), self._mouse_pos.y())
+            ])
         self._shape.addPolygon(poly)
         self._shape.closeSubpath()
 
@@ -122,10 +168,31 @@ class RubberBand(QtWidgets.QGraphicsItem):
         color = palette.highlight().color()
         color.setAlphaF(0.2)
         painter.setBrush(QtGui.QColor(color))
-        painter.drawRect(self.shape().controlPointRect())
+        if self._is_lasso:
+            painter.drawPath(self._shape)
+        else:
+            painter.drawRect(self.shape().controlPointRect())
 
         return
 
+    def reset(self, init_pos, lasso=False):
+        """Re-initialize a released rubber band so that the scene can reuse
+        it (see :class:`nodegraph.pool.ItemPool`)
+
+        :param init_pos: Point of origin of the rubber band
+        :type init_pos: :class:`QtCore.QPointF`
+
+        :param lasso: If true, the shape is drawn freehand by the mouse
+        :type lasso: bool
+
+        """
+        self._selection_mode = self.REPLACE_SELECTION
+        self._preview = set()
+        self._preview_rect = None
+        self._is_lasso = lasso
+        self._mouse_pos = init_pos
+        self.refresh(init_pos=init_pos)
+
     def refresh(self, mouse_pos=None, init_pos=None):
         """Update corner of rubber band defined by mouse pos
 
@@ -133,15 +200,83 @@ class RubberBand(QtWidgets.QGraphicsItem):
         :type mouse_pos: :class:`QtCore.QPointF`
 
         """
-        if mouse_pos:
-            self._mouse_pos = mouse_pos
         if init_pos:
             self._source_pos = init_pos
+            self._points = [init_pos]
+        if mouse_pos:
+            self._mouse_pos = mouse_pos
+            if self._is_lasso and mouse_pos != self._points[-1]:
+                self._points.append(mouse_pos)
 
         # self.scene().setSelectionArea(self.shape(),
         #                               QtCore.Qt.ContainsItemBoundingRect)
         self.prepareGeometryChange()
         self.update()
+        if not self._is_lasso:
+            self.update_preview()
+
+    def update_preview(self, intersect=None):
+        """Highlight items that would be selected on release
+
+        Only items within the area swept since the last call (i.e. the
+        difference between the previous and current rectangle) can enter or
+        leave the rubber band, hence the cost is proportional to the change.
+
+        :param intersect:
+            Specify how items are selected, by default the item bounding box
+            must be fully contained
+        :type intersect: :class:`QtCore.Qt.ItemSelectionMode`
+
+        """
+        intersect = intersect or QtCore.Qt.ContainsItemBoundingRect
+        contains = intersect in [QtCore.Qt.ContainsItemShape,
+                                 QtCore.Qt.ContainsItemBoundingRect]
+        scene = self.scene()  # alias
+        bbox = self.boundingRect()
+        rect = (bbox.left(), bbox.top(), bbox.right(), bbox.bottom())
+        previous = self._preview_rect
+        if rect == previous:
+            return
+        self._preview_rect = rect
+
+        # Resolve swept area
+        if previous is None:
+            strips = [rect]
+        else:
+            strips = _subtract(rect, previous) + _subtract(previous, rect)
+
+        candidates = set()
+        for strip in strips:
+            candidates.update(scene.items_in_rect(
+                QtCore.QRectF(QtCore.QPointF(strip[0], strip[1]),
+                              QtCore.QPointF(strip[2], strip[3])),
+                QtCore.Qt.IntersectsItemBoundingRect))
+
+        # Update items entering or leaving
+        left, top, right, bottom = rect
+        for item in candidates:
+            r = scene.index_rect(item)
+            if contains:
+                inside = (left <= r[0] and r[2] <= right and
+                          top <= r[1] and r[3] <= bottom)
+            else:
+                inside = (r[0] <= right and left <= r[2] and
+                          r[1] <= bottom and top <= r[3])
+            if inside and item not in self._preview:
+                self._preview.add(item)
+                item.set_preview(True)
+            elif not inside and item in self._preview:
+                self._preview.discard(item)
+                item.set_preview(False)
+
+    def clear_preview(self):
+        """Remove highlight from all previewed items
+
+        """
+        for item in self._preview:
+            item.set_preview(False)
+        self._preview = set()
+        self._preview_rect = None
 
     def update_scene_selection(self, operation=None, intersect=None):
         """Update scene selection from the current rubber band bounding box
@@ -157,27 +292,31 @@ class RubberBand(QtWidgets.QGraphicsItem):
         """
         operation = operation or self.REPLACE_SELECTION
         intersect = intersect or QtCore.Qt.ContainsItemBoundingRect
+        scene = self.scene()  # alias
 
-        if operation == self.ADD_SELECTION:
-            current_selection = self.scene().selectedItems()
-            self.scene().setSelectionArea(self.shape(), intersect)
-
-            for item in current_selection:
-                item.setSelected(True)
+        # Query scene spatial index and apply as a single transaction
+        if self._is_lasso:
+            items = self._get_lasso_items()
+        else:
+            items = scene.items_in_rect(self.boundingRect(), intersect)
+        scene.update_selection(items, operation)
 
-        elif operation == self.MINUS_SELECTION:
-            items = self.scene().items(self.shape(), intersect)
+    def _get_lasso_items(self):
+        """Return nodes and edges which center lies within the lasso
 
-            for item in items:
-                item.setSelected(False)
+        Candidates are prefiltered with the lasso bounding box through the
+        scene spatial index before testing their center against the lasso.
 
-        elif operation == self.TOGGLE_SELECTION:
-            items = self.scene().items(self.shape(), intersect)
+        :rtype: list
 
-            for item in items:
-                if item.isSelected():
-                    item.setSelected(False)
-                else:
-                    item.setSelected(True)
-        else:
-            self.scene().setSelectionArea(self.shape(), intersect)
+        """
+        scene = self.scene()  # alias
+        items = scene.items_in_rect(self.boundingRect(),
+                                    QtCore.Qt.IntersectsItemBoundingRect)
+        centers = []
+        for item in items:
+            r = scene.index_rect(item)
+            centers.append(((r[0] + r[2]) / 2.0, (r[1] + r[3]) / 2.0))
+        polygon = [(p.x(), p.y()) for p in self._points]
+        inside = points_in_polygon(centers, polygon)
+        return [item for item, test in zip(items, inside) if test]
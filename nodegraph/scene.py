@@ -12,13 +12,23 @@
 """Node graph scene manager based on QGraphicsScene
 
 """
+import contextlib
+
 from Qt import QtCore, QtGui, QtWidgets
 
 from .node import Node, NodeSlot
-from .edge import Edge, InteractiveEdge
+from .edge import Edge, InteractiveEdge, refresh_edges
 from .rubberband import RubberBand
+from .drag import DragGroup, SnapshotDrag
+from .spatial import GridIndex, Bounds
+from .pool import ItemPool
+from .nodetype import get_node_type
+from .group import Subgraph
+from .backdrop import Backdrop, BackdropContent
+from .density import DensityMap
 
-from .constant import SCENE_WIDTH, SCENE_HEIGHT
+from .constant import (SCENE_WIDTH, SCENE_HEIGHT, LOD_FULL, SNAP_RADIUS,
+                       GROUP_TYPE)
 
 
 class Scene(QtWidgets.QGraphicsScene):
@@ -28,20 +38,69 @@ class Scene(QtWidgets.QGraphicsScene):
 
     """
 
-    def __init__(self, parent=None, nodegraph_widget=None):
+    # Drag modes of selected nodes
+    DRAG_ITEMS = 0
+    DRAG_SNAPSHOT = 1
+    DRAG_GROUP = 2
+
+    def __init__(self, parent=None, nodegraph_widget=None, qt_index=True):
         """Create an instance of this class
 
+        :param qt_index: If false, Qt indexing is disabled and the scene only
+            relies on its own spatial index
+        :type qt_index: bool
+
         """
         QtWidgets.QGraphicsScene.__init__(self, parent)
         self.parent = parent
         self._nodegraph_widget = nodegraph_widget
-        self._nodes = []
+        self._nodes = {}
         self._edges_by_hash = {}
         self._is_interactive_edge = False
         self._is_refresh_edges = False
         self._interactive_edge = None
-        self._refresh_edges = {}
+        self._snap_slot = None
+        self._selection_batch = 0
+        self._is_selection_changed = False
+        self._selected_nodes = set()
+        self._edge_ends = {}
+        self._refresh_edges = {"move": set(), "refresh": set()}
         self._rubber_band = None
+        self._is_lasso = False
+        self._drag = None
+        self._drag_mode = self.DRAG_ITEMS
+        self._lod = LOD_FULL
+
+        # Released items kept for reuse
+        self._pool = ItemPool()
+
+        # Headless model (virtualized mode)
+        self._model = None
+        self._materialized = set()
+        self._is_materializing = False
+
+        # Collapsed groups
+        self._groups = {}
+        self._group_count = 0
+
+        # Backdrops, with edges leaving the ones being dragged
+        self._backdrops = []
+        self._moving_backdrops = {}
+
+        # Tile caches of the views, kept valid between pans
+        self._tile_caches = []
+
+        # Spatial index
+        self._node_index = GridIndex()
+        self._slot_index = GridIndex(cell_size=128)
+        self._edge_index = GridIndex()
+        self._backdrop_index = GridIndex()
+        self._node_bounds = Bounds()
+        self._selection_bounds = Bounds()
+        self._density = DensityMap()
+        self._edge_density = None
+        if not qt_index:
+            self.setItemIndexMethod(QtWidgets.QGraphicsScene.NoIndex)
 
         # Registars
         self._is_rubber_band = False
@@ -64,14 +123,14 @@ class Scene(QtWidgets.QGraphicsScene):
         palette.setColor(QtGui.QPalette.ButtonText, QtGui.QColor(20, 20, 20))
         self.setPalette(palette)
 
-        self.selectionChanged.connect(self._onSelectionChanged)
-
     @property
     def nodes(self):
         """Return all nodes
 
+        :rtype: list
+
         """
-        return self._nodes
+        return list(self._nodes.values())
 
     @property
     def is_interactive_edge(self):
@@ -87,38 +146,1097 @@ class Scene(QtWidgets.QGraphicsScene):
         """
         return self._edges_by_hash
 
-    def create_node(self, name, inputs=["in"], parent=None):
+    @property
+    def drag_mode(self):
+        """Return how selected nodes are dragged
+
+        """
+        return self._drag_mode
+
+    @drag_mode.setter
+    def drag_mode(self, value):
+        """Set how selected nodes are dragged
+
+        :param value: One of DRAG_ITEMS, DRAG_SNAPSHOT, DRAG_GROUP
+        :type value: int
+
+        """
+        self._drag_mode = value
+
+    @property
+    def is_lasso(self):
+        """Return True if rubber band selection is drawn freehand
+
+        """
+        return self._is_lasso
+
+    @is_lasso.setter
+    def is_lasso(self, value):
+        """Set rubber band selection to lasso or rectangle
+
+        :type value: bool
+
+        """
+        self._is_lasso = value
+
+    @property
+    def pool(self):
+        """Return pool of released items, see its stats for reuse rates
+
+        :rtype: :class:`nodegraph.pool.ItemPool`
+
+        """
+        return self._pool
+
+    @property
+    def model(self):
+        """Return headless model of a virtualized scene, or None
+
+        """
+        return self._model
+
+    def virtualize(self, model):
+        """Switch scene to virtualized mode: the whole graph lives in the
+        given headless model and graphics items are only materialized for
+        the records a view asks for, see :meth:`materialize`.
+
+        Must be called on an empty scene.
+
+        :param model: Headless graph
+        :type model: :class:`nodegraph.model.GraphModel`
+
+        """
+        self._model = model
+        self._materialized = set()
+
+        # Density maps follow the model records, materialized or not
+        self._density.build([])
+        model.add_observer(nodes=self._density)
+        if self._edge_density is not None:
+            self._edge_density.build([])
+            model.add_observer(edges=self._edge_density)
+
+    @property
+    def density(self):
+        """Return density map of all nodes (including the ones not
+        materialized in virtualized mode)
+
+        :rtype: :class:`nodegraph.density.DensityMap`
+
+        """
+        return self._density
+
+    @property
+    def edge_density(self):
+        """Return density map of edge midpoints, built on first access then
+        maintained as edges are indexed (or as model records change in
+        virtualized mode)
+
+        :rtype: :class:`nodegraph.density.DensityMap`
+
+        """
+        if self._edge_density is None:
+            self._edge_density = DensityMap(color=(120, 160, 255))
+            if self._model is not None:
+                self._model.add_observer(edges=self._edge_density)
+            else:
+                self._edge_density.build(
+                    (self._edge_record_key(e),
+                     (e._source_slot._cx + e._target_slot._cx) / 2,
+                     (e._source_slot._cy + e._target_slot._cy) / 2)
+                    for e in self._edges_by_hash.values())
+        return self._edge_density
+
+    @property
+    def view_scale(self):
+        """Return scale of the first view of this scene
+
+        """
+        views = self.views()
+        return views[0].transform().m11() if views else 1.0
+
+    @property
+    def lod(self):
+        """Return current level of detail tier
+
+        """
+        return self._lod
+
+    def set_lod(self, lod):
+        """Broadcast level of detail tier to all nodes and edges
+
+        :param lod: Level of detail tier
+        :type lod: int
+
+        """
+        if lod == self._lod:
+            return
+
+        self._lod = lod
+        for cache in self._tile_caches:
+            cache.clear()
+        for node in self._nodes.values():
+            node.set_lod(lod)
+        for edge in self._edges_by_hash.values():
+            edge.set_lod(lod)
+        if self._interactive_edge:
+            self._interactive_edge.set_lod(lod)
+
+    def create_node(self, name, inputs=None, parent=None, type=None):
         """Create a new node
 
+        :param name: Unique name of the node
+        :type name: str
+
+        :param inputs: Input slot names, default inputs of the type if None
+        :type inputs: list
+
+        :param type: Name of a registered node type, generic type if None
+        :type type: str
+
         """
-        node = Node(name, self, inputs=inputs, parent=parent)
-        self._nodes.append(node)
+        node_type = get_node_type(type)
+        if inputs is None:
+            inputs = node_type.inputs
+
+        node = self._pool.acquire(Node)
+        if node:
+            node.reset(name, inputs, node_type)
+            node.setParentItem(parent)
+            node.setVisible(True)
+        else:
+            node = Node(name, self, inputs=inputs, parent=parent,
+                        node_type=node_type)
+        self._nodes[name] = node
+
+        # Link to (or add) model record
+        if self._model is not None:
+            record = self._model.node(name)
+            if record is None:
+                record = self._model.add_node(name, inputs, node_type=type)
+            record.item = node
+            self._materialized.add(record)
+            node.setPos(record.x, record.y)
+
+        self.index_node(node)
         return node
 
     def create_edge(self, source, target):
         """Create a new edge
 
         """
-        edge = Edge(source, target, self, arrow=Edge.ARROW_STANDARD)
+        edge = self._pool.acquire(Edge)
+        if edge:
+            edge.reset(source, target)
+            edge.setVisible(True)
+        else:
+            edge = Edge(source, target, self, arrow=Edge.ARROW_STANDARD)
         self._edges_by_hash[edge.hash] = edge
+        self._update_edge_parent(edge)
+
+        # Link to (or add) model record
+        if self._model is not None:
+            self._model.add_edge(source.parent.name, target.parent.name,
+                                 target.name).item = edge
+
+        # Classify against current selection
+        for node in (source.parent, target.parent):
+            if node in self._selected_nodes:
+                self._update_edge_ends(edge.hash, 1)
+
+        # Grow variable-input node
+        if not self._is_materializing:
+            self._update_dynamic_inputs(target.parent)
         return edge
 
+    def delete_edge(self, edge):
+        """Delete an edge, from the model too in virtualized mode. A
+        variable-input node drops the input the edge was connected to.
+
+        :param edge: Edge to delete
+        :type edge: :class:`nodegraph.edge.Edge`
+
+        """
+        target = edge._target_slot
+        self._detach_edge(edge)
+        self._update_dynamic_inputs(target.parent, target)
+
+    def _detach_edge(self, edge):
+        """Delete an edge without updating inputs of its target node
+
+        :param edge: Edge to delete
+        :type edge: :class:`nodegraph.edge.Edge`
+
+        """
+        key = self._edge_record_key(edge)
+        self._remove_edge_item(edge)
+        if self._model is not None:
+            self._model.remove_edge(key)
+        elif self._edge_density is not None:
+            self._edge_density.remove(key)
+
+    def delete_node(self, node):
+        """Delete a node and its edges, from the model too in virtualized
+        mode
+
+        :param node: Node to delete
+        :type node: :class:`nodegraph.node.Node`
+
+        """
+        self.delete_nodes([node])
+
+    def delete_nodes(self, nodes):
+        """Delete nodes and their edges, from the model too in virtualized
+        mode. Surviving variable-input nodes drop the inputs freed by these
+        edges once all of them are removed.
+
+        :param nodes: Nodes to delete
+        :type nodes: list
+
+        """
+        eh = self._edges_by_hash  # shortcut
+        deleted = set(nodes)
+        freed = []
+        for node in nodes:
+            for ahash in node.edges:
+                edge = eh[ahash]
+                target = edge._target_slot
+                self._detach_edge(edge)
+                if target.parent not in deleted:
+                    freed.append(target)
+        for node in nodes:
+            self._remove_node_item(node)
+            self._remove_node_record(node.name)
+
+        for target in freed:
+            self._update_dynamic_inputs(target.parent, target)
+
+    def collapse_selection(self, name=None):
+        """Collapse selected nodes into a group node
+
+        Internal nodes and edges are removed from the scene (and from the
+        model in virtualized mode) and kept by the group as a
+        :class:`nodegraph.group.Subgraph`. The group gets one input per edge
+        entering the selection, and its output replaces the source of edges
+        leaving it.
+
+        :param name: Unique name of the group node
+        :type name: str
+
+        :returns: Group node or None if no node is selected
+        :rtype: :class:`nodegraph.node.Node`
+
+        """
+        nodes = list(self._selected_nodes)
+        if not nodes:
+            return None
+
+        # Edges leaving the selection must all be materialized
+        if self._model is not None:
+            self._materialize_records([self._model.node(n.name)
+                                       for n in nodes], neighbours=True)
+
+        if name is None:
+            self._group_count += 1
+            name = "group%d" % self._group_count
+
+        # Classify edges
+        eh = self._edges_by_hash  # shortcut
+        internal = []
+        entering = []
+        leaving = []
+        hashes = set()
+        for node in nodes:
+            hashes.update(node.edges)
+        for ahash in hashes:
+            edge = eh[ahash]
+            source_in = edge._source_slot.parent in self._selected_nodes
+            target_in = edge._target_slot.parent in self._selected_nodes
+            if source_in and target_in:
+                internal.append(edge)
+            elif target_in:
+                entering.append(edge)
+            else:
+                leaving.append(edge)
+
+        # Record content
+        subgraph = Subgraph()
+        for node in nodes:
+            pos = node.scenePos()
+            subgraph.model.add_node(node.name,
+                                    [i.name for i in node._inputs],
+                                    pos.x(), pos.y(), node.node_type.name)
+        for edge in internal:
+            subgraph.model.add_edge(*self._edge_record_key(edge))
+
+        inputs = []
+        sources = []
+        for index, edge in enumerate(entering):
+            input_name = "in%d" % index
+            inputs.append(input_name)
+            sources.append(edge._source_slot)
+            subgraph.add_input(input_name, edge._target_slot.parent.name,
+                               edge._target_slot.name)
+        targets = []
+        for edge in leaving:
+            targets.append(edge._target_slot)
+            subgraph.add_output(edge._target_slot.parent.name,
+                                edge._target_slot.name,
+                                edge._source_slot.parent.name)
+
+        # Replace content by the group
+        center = self.get_selection_bbox().center()
+        with self.batch_selection():
+            for edge in internal + entering + leaving:
+                self._detach_edge(edge)
+            for node in nodes:
+                self._remove_node_item(node)
+                self._remove_node_record(node.name)
+
+            group = self.create_node(name, inputs, type=GROUP_TYPE)
+            self._groups[name] = subgraph
+            group.setPos(center - group.boundingRect().center())
+            subgraph.origin = (group.x(), group.y())
+            for source, aninput in zip(sources, group._inputs):
+                self.create_edge(source, aninput)
+            for target in targets:
+                self.create_edge(group._output, target)
+            group.setSelected(True)
+        return group
+
+    def expand_group(self, group):
+        """Replace a group node by its content, where it was collapsed
+
+        :param group: Group node
+        :type group: :class:`nodegraph.node.Node`
+
+        :returns: Expanded nodes
+        :rtype: list
+
+        """
+        subgraph = self._groups.pop(group.name, None)
+        if subgraph is None:
+            return []
+
+        # Boundary edges must all be materialized
+        if self._model is not None:
+            self._materialize_records([self._model.node(group.name)],
+                                      neighbours=True)
+
+        # Current boundary edges of the group
+        eh = self._edges_by_hash  # shortcut
+        entering = [(eh[h]._source_slot, aninput.name)
+                    for aninput in group._inputs for h in aninput._edge]
+        leaving = [eh[h]._target_slot for h in group._output._edge]
+
+        # Content follows the group since it was collapsed
+        pos = group.scenePos()
+        dx = pos.x() - subgraph.origin[0]
+        dy = pos.y() - subgraph.origin[1]
+
+        with self.batch_selection():
+            for ahash in group.edges:
+                self._detach_edge(eh[ahash])
+            self._remove_node_item(group)
+            self._remove_node_record(group.name)
+
+            # Restore content, renaming nodes which names got taken
+            nodes = {}
+            for record in subgraph.model.nodes.values():
+                node = self.create_node(self._unique_name(record.name),
+                                        record.inputs, type=record.node_type)
+                node.setPos(record.x + dx, record.y + dy)
+                nodes[record.name] = node
+            for record in subgraph.model.edges.values():
+                self.create_edge(nodes[record.source]._output,
+                                 nodes[record.target].input(
+                                     record.target_slot))
+
+            # Reconnect boundary edges
+            for source, input_name in entering:
+                node_name, slot_name = subgraph.input(input_name)
+                self.create_edge(source, nodes[node_name].input(slot_name))
+            for target in leaving:
+                node_name = subgraph.output(target.parent.name, target.name)
+                if node_name:
+                    self.create_edge(nodes[node_name]._output, target)
+
+            self.update_selection(nodes.values())
+        return list(nodes.values())
+
+    def _unique_name(self, name):
+        """Return the given name, or a variation of it if a node (or a
+        model record) already has it
+
+        :rtype: str
+
+        """
+        model = self._model  # alias
+        candidate = name
+        index = 0
+        while (candidate in self._nodes or
+               (model is not None and candidate in model)):
+            index += 1
+            candidate = "%s_%d" % (name, index)
+        return candidate
+
+    def is_group(self, node):
+        """Return True if the node is a collapsed group
+
+        :param node: Any node
+        :type node: :class:`nodegraph.node.Node`
+
+        """
+        return node.name in self._groups
+
+    def create_backdrop(self, name, rect=None, color=None, margin=40):
+        """Create a backdrop and adopt the nodes it contains
+
+        :param name: Title of the backdrop
+        :type name: str
+
+        :param rect: Scene rectangle, bounding box of selected nodes plus a
+            margin if None
+        :type rect: :class:`QtCore.QRectF`
+
+        :param color: Color as [red, green, blue]
+        :type color: list
+
+        :param margin: Margin around selected nodes
+        :type margin: int
+
+        :returns: Backdrop or None if no rectangle could be resolved
+        :rtype: :class:`nodegraph.backdrop.Backdrop`
+
+        """
+        if rect is None:
+            rect = self.get_selection_bbox()
+            if rect.isNull():
+                return None
+            rect = rect.adjusted(-margin, -margin * 2, margin, margin)
+
+        backdrop = Backdrop(name, rect, self, color)
+        self._backdrops.append(backdrop)
+        self.index_backdrop(backdrop)
+
+        # Adopt contained nodes
+        bbox = (rect.left(), rect.top(), rect.right(), rect.bottom())
+        self.drop_nodes(self._node_index.query_rect(bbox, True))
+        return backdrop
+
+    def delete_backdrop(self, backdrop):
+        """Delete a backdrop, its content is given back to the scene
+
+        :param backdrop: Backdrop to delete
+        :type backdrop: :class:`nodegraph.backdrop.Backdrop`
+
+        """
+        for item in backdrop.content.childItems():
+            pos = item.scenePos()
+            item.setParentItem(None)
+            item.setPos(pos)
+        self._moving_backdrops.pop(backdrop, None)
+        self._discard_item_tiles(self._backdrop_index, backdrop)
+        self._backdrop_index.remove(backdrop)
+        self._backdrops.remove(backdrop)
+        self.removeItem(backdrop.content)
+        self.removeItem(backdrop)
+
+    def backdrop_at(self, pos):
+        """Return the smallest backdrop containing a scene position
+
+        :param pos: Scene position
+        :type pos: :class:`QtCore.QPointF`
+
+        :rtype: :class:`nodegraph.backdrop.Backdrop`
+
+        """
+        backdrops = self._backdrop_index.query_point(pos.x(), pos.y())
+        if not backdrops:
+            return None
+        return min(backdrops, key=lambda b: (b.boundingRect().width() *
+                                             b.boundingRect().height()))
+
+    def drop_nodes(self, nodes):
+        """Move nodes in or out of backdrops, depending on the backdrop (if
+        any) their center lies in. Nodes of a selected backdrop are left
+        untouched since they moved along with it.
+
+        :param nodes: Moved nodes
+        :type nodes: list
+
+        """
+        for node in nodes:
+            parent = node.parentItem()
+            if parent is not None:
+                if (not isinstance(parent, BackdropContent) or
+                        parent.backdrop.isSelected()):
+                    continue
+                parent = parent.backdrop
+            left, top, right, bottom = self._node_index.rect(node)
+            backdrop = self.backdrop_at(QtCore.QPointF((left + right) / 2,
+                                                       (top + bottom) / 2))
+            if backdrop is not parent:
+                self._set_backdrop(node, backdrop)
+
+    def _set_backdrop(self, node, backdrop):
+        """Parent a node to a backdrop (or to the scene if None) without
+        moving it, and update parents of its edges
+
+        :param node: Node to move in or out
+        :type node: :class:`nodegraph.node.Node`
+
+        :param backdrop: New backdrop of the node
+        :type backdrop: :class:`nodegraph.backdrop.Backdrop`
+
+        """
+        pos = node.scenePos()
+        content = backdrop.content if backdrop else None
+        node.setParentItem(content)
+        node.setPos(content.mapFromScene(pos) if content else pos)
+        eh = self._edges_by_hash  # shortcut
+        for ahash in node.edges:
+            self._update_edge_parent(eh[ahash])
+
+    def _update_edge_parent(self, edge):
+        """Parent an edge to the content of the backdrop holding both its
+        ends, to the scene otherwise
+
+        :param edge: Edge to update
+        :type edge: :class:`nodegraph.edge.Edge`
+
+        """
+        source = edge._source_slot.parent.parentItem()
+        target = edge._target_slot.parent.parentItem()
+        parent = None
+        if source is target and isinstance(source, BackdropContent):
+            parent = source
+        if edge.parentItem() is not parent:
+            pos = edge.scenePos()
+            edge.setParentItem(parent)
+            edge.setPos(parent.mapFromScene(pos) if parent else pos)
+
+    def backdrop_moved(self, backdrop):
+        """Update content of a moved backdrop
+
+        While dragged, only slot centers of nodes with edges leaving the
+        backdrop, and these edges, are refreshed. Content is re-indexed once
+        the mouse is released.
+
+        :param backdrop: Moved backdrop
+        :type backdrop: :class:`nodegraph.backdrop.Backdrop`
+
+        """
+        if not self._is_left_mouse:
+            self.index_backdrop(backdrop)
+            return
+
+        boundary = self._moving_backdrops.get(backdrop)
+        if boundary is None:
+            boundary = self._backdrop_boundary(backdrop)
+            self._moving_backdrops[backdrop] = boundary
+        nodes, edges = boundary
+        for node in nodes:
+            node.update_slot_centers()
+        refresh_edges(edges)
+
+    def _backdrop_boundary(self, backdrop):
+        """Return nodes of a backdrop connected to outside nodes and edges
+        leaving the backdrop
+
+        :rtype: tuple
+
+        """
+        eh = self._edges_by_hash  # shortcut
+        nodes = []
+        edges = set()
+        for node in backdrop.nodes:
+            leaving = [eh[h] for h in node.edges
+                       if eh[h].parentItem() is not backdrop.content]
+            if leaving:
+                nodes.append(node)
+                edges.update(leaving)
+        return nodes, list(edges)
+
+    def index_backdrop(self, backdrop):
+        """Update backdrop and its content in the spatial index, and refresh
+        edges leaving it
+
+        :param backdrop: Backdrop to (re-)index
+        :type backdrop: :class:`nodegraph.backdrop.Backdrop`
+
+        """
+        rect = backdrop.sceneBoundingRect()
+        rect = (rect.left(), rect.top(), rect.right(), rect.bottom())
+        self._discard_item_tiles(self._backdrop_index, backdrop)
+        self._discard_tiles(rect)
+        self._backdrop_index.update(backdrop, rect)
+        for item in backdrop.content.childItems():
+            if isinstance(item, Node):
+                item.update_slot_centers()
+                self.index_node(item)
+            elif isinstance(item, Edge):
+                self.index_edge(item)
+        refresh_edges(self._backdrop_boundary(backdrop)[1])
+
+    def _update_dynamic_inputs(self, node, freed=None):
+        """Add or remove inputs of a variable-input node after one of its
+        edges changed, and keep its model record in sync
+
+        :param node: Target node of the edge
+        :type node: :class:`nodegraph.node.Node`
+
+        :param freed: Input which edge was removed, if any
+        :type freed: :class:`nodegraph.node.NodeSlot`
+
+        """
+        if not node.is_dynamic:
+            return
+        node.update_dynamic_inputs(freed)
+        if self._model is not None:
+            record = self._model.node(node.name)
+            if record is not None:
+                record.inputs = [i.name for i in node._inputs]
+
+    def add_tile_cache(self, cache):
+        """Register the tile cache of a view, its tiles are dropped when
+        items under them change, even while the view isn't panning
+
+        :param cache: Tile cache
+        :type cache: :class:`nodegraph.tiles.TileCache`
+
+        """
+        self._tile_caches.append(cache)
+
+    def _discard_tiles(self, rect):
+        """Drop cached tiles intersecting a scene rectangle
+
+        :param rect: Rectangle as (left, top, right, bottom)
+        :type rect: tuple
+
+        """
+        for cache in self._tile_caches:
+            cache.discard(rect)
+
+    def _discard_item_tiles(self, index, item):
+        """Drop cached tiles under the indexed rectangle of an item
+
+        :param index: Spatial index holding the item
+        :type index: :class:`nodegraph.spatial.GridIndex`
+
+        :param item: Indexed item
+        :type item: :class:`QtWidgets.QGraphicsItem`
+
+        """
+        if self._tile_caches and item in index:
+            self._discard_tiles(index.rect(item))
+
+    def index_node(self, node, slots=None):
+        """Update node bounding box and slots in the spatial index
+
+        :param node: Node to (re-)index
+        :type node: :class:`nodegraph.node.Node`
+
+        :param slots: Only (re-)index these slots, all of them if None
+        :type slots: list
+
+        """
+        pos = node.scenePos()
+        x = pos.x()
+        y = pos.y()
+        bbox = node.boundingRect()
+        rect = (x + bbox.left(), y + bbox.top(),
+                x + bbox.right(), y + bbox.bottom())
+        self._discard_item_tiles(self._node_index, node)
+        self._discard_tiles(rect)
+        self._node_index.update(node, rect)
+        self._node_bounds.update(node, rect)
+        if self._model is not None:
+            self._model.move_node(node.name, x, y)
+        else:
+            self._density.move(node.name, (rect[0] + rect[2]) / 2,
+                               (rect[1] + rect[3]) / 2)
+        if node in self._selected_nodes:
+            self._selection_bounds.update(node, rect)
+        r = node._slot_radius
+        for slot in (node.slots if slots is None else slots):
+            self._slot_index.update(slot, (slot._cx - r, slot._cy - r,
+                                           slot._cx + r, slot._cy + r))
+
+    def _remove_node_record(self, name):
+        """Remove a deleted node from the model in virtualized mode, from the
+        density map otherwise
+
+        :param name: Name of the node
+        :type name: str
+
+        """
+        if self._model is not None:
+            self._model.remove_node(name)
+        else:
+            self._density.remove(name)
+
+    def _edge_record_key(self, edge):
+        """Return model key of an edge
+
+        :rtype: tuple
+
+        """
+        return (edge._source_slot.parent.name,
+                edge._target_slot.parent.name,
+                edge._target_slot.name)
+
+    def _remove_edge_item(self, edge):
+        """Remove an edge item from the scene registars and release it to the
+        pool, its model record (if any) is kept
+
+        :param edge: Edge to remove
+        :type edge: :class:`nodegraph.edge.Edge`
+
+        """
+        ahash = edge.hash
+        edge._source_slot.remove_edge(ahash)
+        edge._target_slot.remove_edge(ahash)
+        self._update_edge_ends(ahash, -self._edge_ends.get(ahash, 0))
+        del self._edges_by_hash[ahash]
+        self._discard_item_tiles(self._edge_index, edge)
+        self._edge_index.remove(edge)
+        edge.setParentItem(None)
+        self._pool.release(edge)
+
+        if self._model is not None:
+            record = self._model.edges.get(self._edge_record_key(edge))
+            if record is not None:
+                record.item = None
+
+    def _remove_node_item(self, node):
+        """Remove a node item, and the edge items connected to it, from the
+        scene registars and release them to the pool, model records (if any)
+        are kept
+
+        :param node: Node to remove
+        :type node: :class:`nodegraph.node.Node`
+
+        """
+        eh = self._edges_by_hash  # shortcut
+        for slot in node.slots:
+            for ahash in slot.edge:
+                self._remove_edge_item(eh[ahash])
+            self._slot_index.remove(slot)
+
+        if self._snap_slot and self._snap_slot.parent is node:
+            self._snap_slot = None
+        self._selected_nodes.discard(node)
+        self._selection_bounds.remove(node)
+        self._discard_item_tiles(self._node_index, node)
+        self._node_index.remove(node)
+        self._node_bounds.remove(node)
+        del self._nodes[node.name]
+        node.setParentItem(None)
+        self._pool.release(node)
+
+        if self._model is not None:
+            record = self._model.node(node.name)
+            if record is not None:
+                record.item = None
+                self._materialized.discard(record)
+
+    def materialize(self, rect):
+        """Create graphics items for the model records needed to display a
+        scene rectangle and release the ones out of it (selected nodes are
+        kept). Edges are materialized once both their ends are.
+
+        Only available in virtualized mode, see :meth:`virtualize`
+
+        :param rect: Scene rectangle, usually the visible area plus a margin
+        :type rect: :class:`QtCore.QRectF`
+
+        """
+        model = self._model  # alias
+        wanted = model.query((rect.left(), rect.top(),
+                              rect.right(), rect.bottom()))
+
+        # Release records out of reach
+        for record in list(self._materialized - wanted):
+            if not record.item.isSelected():
+                self._remove_node_item(record.item)
+
+        # Create missing nodes and their edges
+        self._materialize_records([r for r in wanted if r.item is None])
+
+    def _materialize_records(self, records, neighbours=False):
+        """Create nodes of the given model records (if needed) and their
+        edges
+
+        :param records: Node records
+        :type records: list
+
+        :param neighbours: If true, nodes at the other end of their edges
+            are materialized as well, otherwise only edges between
+            materialized nodes are created
+        :type neighbours: bool
+
+        """
+        model = self._model  # alias
+
+        # Inputs of variable-input nodes are kept as recorded since some of
+        # their edges may not be materialized
+        self._is_materializing = True
+        for record in records:
+            if record.item is None:
+                self.create_node(record.name, record.inputs,
+                                 type=record.node_type)
+
+        for record in records:
+            for edge in list(model.node_edges(record.name)):
+                if edge.item is not None:
+                    continue
+                ends = (model.node(edge.source), model.node(edge.target))
+                if neighbours:
+                    for end in ends:
+                        if end.item is None:
+                            self.create_node(end.name, end.inputs,
+                                             type=end.node_type)
+                source, target = ends[0].item, ends[1].item
+                if source is None or target is None:
+                    continue
+                slot = target.input(edge.target_slot)
+                if slot:
+                    self.create_edge(source._output, slot)
+        self._is_materializing = False
+
+    def unindex_slot(self, slot):
+        """Remove a slot from the spatial index
+
+        :param slot: Slot removed from its node
+        :type slot: :class:`nodegraph.node.NodeSlot`
+
+        """
+        self._slot_index.remove(slot)
+
+    def index_edge(self, edge):
+        """Update edge bounding box in the spatial index
+
+        :param edge: Edge to (re-)index
+        :type edge: :class:`nodegraph.edge.Edge`
+
+        """
+        rect = edge.sceneBoundingRect()
+        self.index_edges([edge], [(rect.left(), rect.top(),
+                                   rect.right(), rect.bottom())])
+
+    def index_edges(self, edges, rects):
+        """Update bounding boxes of many edges in the spatial index
+
+        :param edges: Edges to (re-)index
+        :type edges: list
+
+        :param rects: Scene bounding boxes of the edges as (left, top, right,
+            bottom)
+        :type rects: iterable
+
+        """
+        index = self._edge_index  # alias
+        if any(self._tile_caches):
+            for edge, rect in zip(edges, rects):
+                self._discard_item_tiles(index, edge)
+                self._discard_tiles(rect)
+                index.update(edge, rect)
+        else:
+            for edge, rect in zip(edges, rects):
+                index.update(edge, rect)
+
+        if self._model is None and self._edge_density is not None:
+            for edge in edges:
+                self._edge_density.move(self._edge_record_key(edge),
+                                        (edge._source_slot._cx +
+                                         edge._target_slot._cx) / 2,
+                                        (edge._source_slot._cy +
+                                         edge._target_slot._cy) / 2)
+
+    def items_at(self, pos):
+        """Return nodes, edges and backdrops under a scene position through
+        the spatial index, top-most first
+
+        :param pos: Scene position
+        :type pos: :class:`QtCore.QPointF`
+
+        :rtype: list
+
+        """
+        x = pos.x()
+        y = pos.y()
+        nodes = [n for n in self._node_index.query_point(x, y)
+                 if n.isVisible()]
+        nodes.sort(key=self._stacking, reverse=True)
+        edges = [e for e in self._edge_index.query_point(x, y)
+                 if e.isVisible() and e.shape().contains(e.mapFromScene(pos))]
+        backdrops = self._backdrop_index.query_point(x, y)
+        backdrops.sort(key=lambda b: (b.boundingRect().width() *
+                                      b.boundingRect().height()))
+        return nodes + edges + backdrops
+
+    def _stacking(self, item):
+        """Return z values from the top-level ancestor of an item down to the
+        item, which sort items as they are stacked (children are stacked
+        along with their parent)
+
+        :rtype: list
+
+        """
+        values = []
+        while item is not None:
+            values.append(item.zValue())
+            item = item.parentItem()
+        values.reverse()
+        return values
+
+    def items_in_rect(self, rect, mode=QtCore.Qt.IntersectsItemShape):
+        """Return nodes and edges within a scene rectangle through the
+        spatial index. Edges are tested against their bounding box.
+
+        :param rect: Scene rectangle
+        :type rect: :class:`QtCore.QRectF`
+
+        :param mode: Specify how items are selected
+        :type mode: :class:`QtCore.Qt.ItemSelectionMode`
+
+        :rtype: list
+
+        """
+        contains = mode in [QtCore.Qt.ContainsItemShape,
+                            QtCore.Qt.ContainsItemBoundingRect]
+        rect = (rect.left(), rect.top(), rect.right(), rect.bottom())
+        items = (self._node_index.query_rect(rect, contains) |
+                 self._edge_index.query_rect(rect, contains))
+        return [i for i in items if i.isVisible()]
+
+    def index_rect(self, item):
+        """Return rectangle of a node or an edge in the spatial index
+
+        :param item: Indexed node or edge
+        :type item: :class:`QtWidgets.QGraphicsItem`
+
+        :returns: Rectangle as (left, top, right, bottom)
+        :rtype: tuple
+
+        """
+        if isinstance(item, Node):
+            return self._node_index.rect(item)
+        return self._edge_index.rect(item)
+
+    def slot_at(self, pos):
+        """Return slot under a scene position
+
+        :param pos: Scene position
+        :type pos: :class:`QtCore.QPointF`
+
+        :rtype: :class:`nodegraph.node.NodeSlot`
+
+        """
+        slots = self._slot_index.query_point(pos.x(), pos.y())
+        return slots[0] if slots else None
+
+    def nearest_nodes(self, pos, k=1, radius=None):
+        """Return nodes closest to a scene position
+
+        :param pos: Scene position
+        :type pos: :class:`QtCore.QPointF`
+
+        :param k: Maximum number of nodes
+        :type k: int
+
+        :param radius: Maximum distance to the node bounding box
+        :type radius: float
+
+        :rtype: list
+
+        """
+        found = self._node_index.nearest(pos.x(), pos.y(), k, radius)
+        return [node for distance, node in found]
+
+    def nearest_slots(self, pos, k=1, radius=None, accept=None):
+        """Return slots closest to a scene position
+
+        :param pos: Scene position
+        :type pos: :class:`QtCore.QPointF`
+
+        :param k: Maximum number of slots
+        :type k: int
+
+        :param radius: Maximum distance to the slot
+        :type radius: float
+
+        :param accept: Optional filter called with each candidate slot
+        :type accept: callable
+
+        :rtype: list
+
+        """
+        found = self._slot_index.nearest(pos.x(), pos.y(), k, radius, accept)
+        return [slot for distance, slot in found]
+
     def start_interactive_edge(self, source_slot, mouse_pos):
         """Create an edge between source slot and mouse position
 
         """
         self._is_interactive_edge = True
         if not self._interactive_edge:
-            # Create interactive edge
-            self._interactive_edge = InteractiveEdge(
-                source_slot,
-                mouse_pos,
-                scene=self,
-                arrow=Edge.ARROW_STANDARD)
+            # Reuse released interactive edge or create one
+            edge = self._pool.acquire(InteractiveEdge)
+            if edge:
+                edge.reset(source_slot, mouse_pos)
+                edge.setVisible(True)
+            else:
+                edge = InteractiveEdge(source_slot,
+                                       mouse_pos,
+                                       scene=self,
+                                       arrow=Edge.ARROW_STANDARD)
+            self._interactive_edge = edge
         else:
             # Re-use existing interactive edge
             self._interactive_edge.refresh(mouse_pos, source_slot)
 
+    def _is_snap_slot(self, slot):
+        """Return True if the interactive edge can be connected to slot
+
+        :param slot: Candidate slot
+        :type slot: :class:`nodegraph.node.NodeSlot`
+
+        """
+        origin = self._interactive_edge._source_slot
+        if slot.family == origin.family or slot.parent is origin.parent:
+            return False
+        if not slot.parent.isVisible():
+            return False
+
+        # An input can only have one edge
+        aninput = slot if slot.family == NodeSlot.INPUT else origin
+        return not aninput._edge
+
+    def update_snap_slot(self, mouse_pos):
+        """Highlight the closest slot the interactive edge can be connected
+        to, within a fixed radius in screen space
+
+        :param mouse_pos: Scene position of the mouse
+        :type mouse_pos: :class:`QtCore.QPointF`
+
+        :returns: Slot to connect to, if any
+        :rtype: :class:`nodegraph.node.NodeSlot`
+
+        """
+        radius = SNAP_RADIUS / self.view_scale
+        slots = self.nearest_slots(mouse_pos, 1, radius, self._is_snap_slot)
+        slot = slots[0] if slots else None
+
+        if slot is not self._snap_slot:
+            if self._snap_slot:
+                self._snap_slot.parent._update_hover_slot(False)
+            if slot:
+                slot.parent._update_hover_slot(slot)
+            self._snap_slot = slot
+        return slot
+
     def stop_interactive_edge(self, connect_to=None):
         """Hide the interactive and create an edge between the source slot
         and the slot given by connect_to
@@ -174,9 +1292,13 @@ class Scene(QtWidgets.QGraphicsScene):
                 # TO DO: Send info to status bar
                 pass
 
-        # Delete item (to be sure it's not taken into account by any function
-        # including but not limited to fitInView)
-        self.removeItem(self._interactive_edge)
+        # Clear snap highlight
+        if self._snap_slot:
+            self._snap_slot.parent._update_hover_slot(False)
+            self._snap_slot = None
+
+        # Hide item until the next interactive edge
+        self._pool.release(self._interactive_edge)
         self._interactive_edge = None
 
     def start_rubber_band(self, init_pos):
@@ -188,8 +1310,14 @@ class Scene(QtWidgets.QGraphicsScene):
         """
         self._is_rubber_band = True
         if not self._rubber_band:
-            # Create custom rubber band
-            self._rubber_band = RubberBand(init_pos, scene=self)
+            # Reuse released rubber band or create one
+            band = self._pool.acquire(RubberBand)
+            if band:
+                band.reset(init_pos, lasso=self._is_lasso)
+                band.setVisible(True)
+            else:
+                band = RubberBand(init_pos, scene=self, lasso=self._is_lasso)
+            self._rubber_band = band
         else:
             # Re-use existing rubber band
             self._rubber_band.refresh(mouse_pos=init_pos, init_pos=init_pos)
@@ -200,6 +1328,7 @@ class Scene(QtWidgets.QGraphicsScene):
 
         """
         self._is_rubber_band = False
+        self._rubber_band.clear_preview()
 
         # Select nodes and edges inside the rubber band
         if self._is_shift_key and self._is_ctrl_key:
@@ -214,30 +1343,181 @@ class Scene(QtWidgets.QGraphicsScene):
         else:
             self._rubber_band.update_scene_selection(intersect)
 
-        self.removeItem(self._rubber_band)
+        self._pool.release(self._rubber_band)
         self._rubber_band = None
 
+    @contextlib.contextmanager
+    def batch_selection(self):
+        """Group selection changes so that selectionChanged is emitted only
+        once, when leaving the outermost block (and only if the selection
+        actually changed)::
+
+            with scene.batch_selection():
+                for item in items:
+                    item.setSelected(True)
+
+        """
+        self._selection_batch += 1
+        blocked = self.blockSignals(True)
+        try:
+            yield
+        finally:
+            self._selection_batch -= 1
+            if not self._selection_batch:
+                self.blockSignals(blocked)
+                if self._is_selection_changed:
+                    self._is_selection_changed = False
+                    self.selectionChanged.emit()
+
+    def selection_item_changed(self, item):
+        """Notify the scene that the selection state of an item changed
+
+        :param item: Node or edge
+        :type item: :class:`QtWidgets.QGraphicsItem`
+
+        """
+        if self._selection_batch:
+            self._is_selection_changed = True
+
+        if isinstance(item, Node):
+            self._discard_item_tiles(self._node_index, item)
+            selected = item.isSelected()
+            if selected == (item in self._selected_nodes):
+                return
+            if selected:
+                self._selected_nodes.add(item)
+                self._selection_bounds.update(item,
+                                              self._node_index.rect(item))
+            else:
+                self._selected_nodes.discard(item)
+                self._selection_bounds.remove(item)
+            delta = 1 if selected else -1
+            for slot in item.slots:
+                for ahash in slot._edge:
+                    self._update_edge_ends(ahash, delta)
+        else:
+            self._discard_item_tiles(self._edge_index, item)
+
+    def _update_edge_ends(self, ahash, delta):
+        """Update count of selected ends of an edge and classify it as an
+        edge to move (both ends selected) or to refresh (one end selected)
+
+        :param ahash: Edge hash
+        :type ahash: str
+
+        :param delta: Number of ends which got selected (or deselected if
+            negative)
+        :type delta: int
+
+        """
+        count = self._edge_ends.get(ahash, 0) + delta
+        move = self._refresh_edges["move"]  # alias
+        refresh = self._refresh_edges["refresh"]  # alias
+        if count >= 2:
+            self._edge_ends[ahash] = count
+            move.add(ahash)
+            refresh.discard(ahash)
+        elif count == 1:
+            self._edge_ends[ahash] = count
+            refresh.add(ahash)
+            move.discard(ahash)
+        else:
+            self._edge_ends.pop(ahash, None)
+            move.discard(ahash)
+            refresh.discard(ahash)
+
+    def update_selection(self, items, operation=None):
+        """Apply a selection operation as a single transaction, only items
+        which selection state differs are touched
+
+        :param items: Nodes and/or edges
+        :type items: list
+
+        :param operation: Replace, add, remove or toggle (as defined by
+            :class:`nodegraph.rubberband.RubberBand`)
+        :type operation: int
+
+        """
+        if operation == RubberBand.ADD_SELECTION:
+            changes = [(i, True) for i in items if not i.isSelected()]
+        elif operation == RubberBand.MINUS_SELECTION:
+            changes = [(i, False) for i in items if i.isSelected()]
+        elif operation == RubberBand.TOGGLE_SELECTION:
+            changes = [(i, not i.isSelected()) for i in items]
+        else:
+            items = set(items)
+            changes = ([(i, False) for i in self.selectedItems()
+                        if i not in items] +
+                       [(i, True) for i in items if not i.isSelected()])
+
+        with self.batch_selection():
+            for item, value in changes:
+                item.setSelected(value)
+
+    def start_drag(self):
+        """Move selected nodes and their internal edges through a single
+        transient item, depending on current drag mode
+
+        """
+        eh = self._edges_by_hash  # shortcut
+        nodes = list(self._selected_nodes)
+        edges = [eh[h] for h in self._refresh_edges["move"]]
+
+        # Selected ends of edges leaving the selection
+        boundary = set()
+        for ahash in self._refresh_edges["refresh"]:
+            for slot in (eh[ahash]._source_slot, eh[ahash]._target_slot):
+                if slot.parent.isSelected():
+                    boundary.add(slot.parent)
+
+        if self._drag_mode == self.DRAG_SNAPSHOT:
+            self._drag = SnapshotDrag(edges + nodes, self, list(boundary),
+                                      self.view_scale)
+        else:
+            self._drag = DragGroup(edges + nodes, self, list(boundary))
+
+    def stop_drag(self):
+        """Commit dragged items at their new position and delete the
+        transient item
+
+        """
+        self._drag.commit()
+        self.removeItem(self._drag)
+        self._drag = None
+
+        # Internal edges were moved through the group
+        for ahash in self._refresh_edges["move"]:
+            self.index_edge(self._edges_by_hash[ahash])
+
     def delete_selected(self):
-        """Delete selected nodes and edges
+        """Delete selected nodes, edges and backdrops
 
         """
         nodes = []
         edges = []
+        backdrops = []
         for i in self.selectedItems():
             if isinstance(i, Node):
                 nodes.append(i)
             if isinstance(i, Edge):
                 edges.append(i)
-
-        print("Node(s) to delete: %s" % [n._name for n in nodes])
-        print("Edge(s) to delete: %r" % edges)
-        for node in self.selectedItems():
-            # TODO: Collect all edges for deletion or reconnection
-            pass
-        # Delete node(s)
-        # self.removeItem(node)
-        # index = self._nodes.index(node)
-        # self._nodes.pop(index)
+            if isinstance(i, Backdrop):
+                backdrops.append(i)
+
+        with self.batch_selection():
+            deleted = set(nodes)
+            for edge in edges:
+                # Might have been deleted already
+                if self._edges_by_hash.get(edge.hash) is not edge:
+                    continue
+                # Inputs of deleted nodes are left as they are
+                if edge._target_slot.parent in deleted:
+                    self._detach_edge(edge)
+                else:
+                    self.delete_edge(edge)
+            self.delete_nodes(nodes)
+            for backdrop in backdrops:
+                self.delete_backdrop(backdrop)
 
     def mousePressEvent(self, event):
         """Re-implements mouse press event
@@ -249,7 +1529,8 @@ class Scene(QtWidgets.QGraphicsScene):
         print("MOUSE PRESS SCENE!")
         if not self._is_interactive_edge:
 
-            if not self.items(event.scenePos()):
+            items = self.items_at(event.scenePos())
+            if not items:
                 self.start_rubber_band(event.scenePos())
 
                 if self._is_shift_key or self._is_ctrl_key:
@@ -260,15 +1541,18 @@ class Scene(QtWidgets.QGraphicsScene):
                     # Mouse is above scene items and single click with modfiers
                     event.accept()
 
+                    # Backdrops only when clicked on their empty area
+                    items = ([i for i in items
+                              if not isinstance(i, Backdrop)] or items)
+
                     if self._is_shift_key and self._is_ctrl_key:
-                        for item in self.items(event.scenePos()):
-                            item.setSelected(not item.isSelected())
+                        self.update_selection(items,
+                                              RubberBand.TOGGLE_SELECTION)
                     elif self._is_shift_key:
-                        for item in self.items(event.scenePos()):
-                            item.setSelected(True)
+                        self.update_selection(items, RubberBand.ADD_SELECTION)
                     elif self._is_ctrl_key:
-                        for item in self.items(event.scenePos()):
-                            item.setSelected(False)
+                        self.update_selection(items,
+                                              RubberBand.MINUS_SELECTION)
 
                     return
         else:
@@ -289,22 +1573,37 @@ class Scene(QtWidgets.QGraphicsScene):
 
         if buttons == QtCore.Qt.LeftButton:
 
+            # Drag group mode?
+            if self._drag:
+                self._drag.drag(event.scenePos() -
+                                event.buttonDownScenePos(QtCore.Qt.LeftButton))
+                eh = self._edges_by_hash  # shortcut
+                refresh_edges([eh[h] for h in self._refresh_edges["refresh"]])
+                return
+            elif (self._drag_mode != self.DRAG_ITEMS and
+                    not self._is_interactive_edge and
+                    not self._is_rubber_band and
+                    isinstance(self.mouseGrabberItem(), Node) and
+                    self.mouseGrabberItem().isSelected()):
+                self._is_refresh_edges = True
+                self.start_drag()
+                return self.mouseMoveEvent(event)
+
             QtWidgets.QGraphicsScene.mouseMoveEvent(self, event)
 
             # Edge creation mode?
             if self._is_interactive_edge:
                 self._interactive_edge.refresh(event.scenePos())
+                self.update_snap_slot(event.scenePos())
             # Selection mode?
             elif self._is_rubber_band:
                 self._rubber_band.refresh(event.scenePos())
-            elif self.selectedItems():
-                if not self._is_refresh_edges:
-                    self._is_refresh_edges = True
-                    self._refresh_edges = self._get_refresh_edges()
+            elif self._selected_nodes:
+                self._is_refresh_edges = True
                 for ahash in self._refresh_edges["move"]:
                     self._edges_by_hash[ahash].refresh_position()
-                for ahash in self._refresh_edges["refresh"]:
-                    self._edges_by_hash[ahash].refresh()
+                eh = self._edges_by_hash  # shortcut
+                refresh_edges([eh[h] for h in self._refresh_edges["refresh"]])
         else:
             return QtWidgets.QGraphicsScene.mouseMoveEvent(self, event)
 
@@ -320,21 +1619,31 @@ class Scene(QtWidgets.QGraphicsScene):
 
         # Edge creation mode?
         if self._is_interactive_edge:
-            slot = None
+            slot = self.update_snap_slot(event.scenePos())
             node = None
-            for item in self.items(event.scenePos()):
-                if isinstance(item, Node):
-                    node = item
-                    slot = node._hover_slot
-                    break
+            if not slot:
+                for item in self.items_at(event.scenePos()):
+                    if isinstance(item, Node):
+                        node = item
+                        break
             connect_to = slot if slot else node
 
             self.stop_interactive_edge(connect_to=connect_to)
 
+        # Drag group mode?
+        if self._drag:
+            self.stop_drag()
+
         # Edge refresh mode?
         if self._is_refresh_edges:
             self._is_refresh_edges = False
-            self._refresh_edges = []
+            self.drop_nodes(list(self._selected_nodes))
+
+        # Backdrop drag mode?
+        if self._moving_backdrops:
+            for backdrop in self._moving_backdrops:
+                self.index_backdrop(backdrop)
+            self._moving_backdrops = {}
 
         # Rubber band mode?
         if self._is_rubber_band:
@@ -349,42 +1658,40 @@ class Scene(QtWidgets.QGraphicsScene):
         :type event: :class:`QtWidgets.QMouseEvent`
 
         """
-        selected = self.items(event.scenePos())
+        selected = self.items_at(event.scenePos())
 
         if len(selected) == 1:
             print("Edit Node %s" % selected[0]._name)
 
-    def _onSelectionChanged(self):
-        """Re-inplements selection changed event
-
-        """
-        if self._is_refresh_edges:
-            self._refresh_edges = self._get_refresh_edges()
+    def get_bbox(self):
+        """Return bounding box of all nodes (including the ones not
+        materialized in virtualized mode), maintained incrementally
 
-    def _get_refresh_edges(self):
-        """Return all edges of selected items
+        :returns: A bounding rectangle (null if there is no node)
+        :rtype: :class:`QtCore.QRectF`
 
         """
-        edges = set()
-        nodes = set()
-        edges_to_move = []
-        edges_to_refresh = []
+        if self._model is not None:
+            rect = self._model.bounds.rect()
+        else:
+            rect = self._node_bounds.rect()
+        if rect is None:
+            return QtCore.QRectF()
+        return QtCore.QRectF(QtCore.QPointF(rect[0], rect[1]),
+                             QtCore.QPointF(rect[2], rect[3]))
 
-        for item in self.selectedItems():
-            if isinstance(item, Node):
-                edges |= item.edges
-                nodes.add(item.name)
+    def get_selection_bbox(self):
+        """Return bounding box of selected nodes, maintained incrementally
 
-        # Distinghish edges where both ends are selected from the rest
-        for edge in edges:
-            if self._edges_by_hash[edge].is_connected_to(nodes):
-                edges_to_move.append(edge)
-            else:
-                edges_to_refresh.append(edge)
+        :returns: A bounding rectangle (null if no node is selected)
+        :rtype: :class:`QtCore.QRectF`
 
-        r = {"move": edges_to_move, "refresh": edges_to_refresh}
-        # print("move: %r\nrefresh: %r" % (edges_to_move, edges_to_refresh))
-        return r
+        """
+        rect = self._selection_bounds.rect()
+        if rect is None:
+            return QtCore.QRectF()
+        return QtCore.QRectF(QtCore.QPointF(rect[0], rect[1]),
+                             QtCore.QPointF(rect[2], rect[3]))
 
     def get_nodes_bbox(self, visible_only=True):
         """Return bounding box of all nodes in scene
@@ -411,7 +1718,7 @@ class Scene(QtWidgets.QGraphicsScene):
         max_x_node = None
         max_y_node = None
 
-        for node in self._nodes:
+        for node in self._nodes.values():
             if visible_only and not node.isVisible():
                 continue
 
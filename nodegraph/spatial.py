@@ -0,0 +1,470 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Spatial structures used to query scene items without going through Qt:
+
+    * GridIndex
+    * Bounds
+    * points_in_polygon
+
+Rectangles are given as (left, top, right, bottom) tuples in scene
+coordinates.
+
+"""
+import math
+import heapq
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class GridIndex(object):
+
+    """
+    Uniform grid spatial index of rectangles.
+
+    Each item is referenced in every cell its rectangle overlaps. Updates
+    are incremental and only touch cells when an item crosses a cell border,
+    which suits clustered node graph layouts much better than a tree built
+    over the whole scene rectangle.
+
+    """
+
+    def __init__(self, cell_size=512):
+        """Create an instance of this class
+
+        :param cell_size: Width and height of a cell in scene units
+        :type cell_size: int
+
+        """
+        self._cell_size = float(cell_size)
+        self._cells = {}
+        self._rects = {}
+        self._ranges = {}
+
+    def __len__(self):
+        """Return number of indexed items
+
+        """
+        return len(self._rects)
+
+    def __contains__(self, item):
+        """Return True if item is indexed
+
+        """
+        return item in self._rects
+
+    @property
+    def cell_size(self):
+        """Return size of a cell
+
+        """
+        return self._cell_size
+
+    def rect(self, item):
+        """Return indexed rectangle of an item
+
+        :rtype: tuple
+
+        """
+        return self._rects[item]
+
+    def _range(self, rect):
+        """Return range of cells overlapped by a rectangle
+
+        :returns: First column, last column, first row, last row
+        :rtype: tuple
+
+        """
+        size = self._cell_size
+        return (int(math.floor(rect[0] / size)),
+                int(math.floor(rect[2] / size)),
+                int(math.floor(rect[1] / size)),
+                int(math.floor(rect[3] / size)))
+
+    def insert(self, item, rect):
+        """Add item to the index
+
+        :param item: Any hashable object
+        :type item: object
+
+        :param rect: Bounding rectangle as (left, top, right, bottom)
+        :type rect: tuple
+
+        """
+        cells = self._cells  # alias
+        cell_range = self._range(rect)
+        self._rects[item] = rect
+        self._ranges[item] = cell_range
+        for column in range(cell_range[0], cell_range[1] + 1):
+            for row in range(cell_range[2], cell_range[3] + 1):
+                key = (column, row)
+                if key in cells:
+                    cells[key].add(item)
+                else:
+                    cells[key] = set([item])
+
+    def remove(self, item):
+        """Remove item from the index
+
+        :param item: An indexed object
+        :type item: object
+
+        """
+        cells = self._cells  # alias
+        cell_range = self._ranges.pop(item, None)
+        if cell_range is None:
+            return
+        del self._rects[item]
+        for column in range(cell_range[0], cell_range[1] + 1):
+            for row in range(cell_range[2], cell_range[3] + 1):
+                key = (column, row)
+                cells[key].discard(item)
+                if not cells[key]:
+                    del cells[key]
+
+    def update(self, item, rect):
+        """Update (or insert) rectangle of an item, cells are only touched
+        when the item crosses a cell border
+
+        :param item: Any hashable object
+        :type item: object
+
+        :param rect: Bounding rectangle as (left, top, right, bottom)
+        :type rect: tuple
+
+        """
+        if self._ranges.get(item) == self._range(rect):
+            self._rects[item] = rect
+            return
+        self.remove(item)
+        self.insert(item, rect)
+
+    def clear(self):
+        """Remove all items
+
+        """
+        self._cells.clear()
+        self._rects.clear()
+        self._ranges.clear()
+
+    def query_point(self, x, y):
+        """Return items whose rectangle contains the given point
+
+        :rtype: list
+
+        """
+        size = self._cell_size
+        key = (int(math.floor(x / size)), int(math.floor(y / size)))
+        rects = self._rects  # alias
+        result = []
+        for item in self._cells.get(key, ()):
+            rect = rects[item]
+            if rect[0] <= x <= rect[2] and rect[1] <= y <= rect[3]:
+                result.append(item)
+        return result
+
+    def query_rect(self, rect, contains=False):
+        """Return items intersecting (or contained by) a rectangle
+
+        :param rect: Query rectangle as (left, top, right, bottom)
+        :type rect: tuple
+
+        :param contains: If True, only return items fully contained
+        :type contains: bool
+
+        :rtype: set
+
+        """
+        left, top, right, bottom = rect
+        cells = self._cells  # alias
+        rects = self._rects  # alias
+        first_col, last_col, first_row, last_row = self._range(rect)
+
+        # Gather candidates, from cells or from all items for huge queries
+        if (last_col - first_col + 1) * (last_row - first_row + 1) > \
+                len(cells):
+            candidates = rects
+        else:
+            candidates = set()
+            for column in range(first_col, last_col + 1):
+                for row in range(first_row, last_row + 1):
+                    items = cells.get((column, row))
+                    if items:
+                        candidates |= items
+
+        result = set()
+        for item in candidates:
+            r = rects[item]
+            if contains:
+                if (left <= r[0] and r[2] <= right and
+                        top <= r[1] and r[3] <= bottom):
+                    result.add(item)
+            elif (r[0] <= right and left <= r[2] and
+                    r[1] <= bottom and top <= r[3]):
+                result.add(item)
+        return result
+
+    def nearest(self, x, y, k=1, radius=None, accept=None):
+        """Return items closest to a point, searching rings of cells around
+        it until the k closest candidates are known. Once the searched square
+        holds more cells than the occupied ones, remaining items are scanned
+        directly, so that far or filtered out items don't make the search
+        visit every empty cell in between.
+
+        :param x: Horizontal scene position
+        :type x: float
+
+        :param y: Vertical scene position
+        :type y: float
+
+        :param k: Maximum number of items to return
+        :type k: int
+
+        :param radius: Ignore items further than this distance
+        :type radius: float
+
+        :param accept: Optional filter called with each candidate item
+        :type accept: callable
+
+        :returns: List of (distance, item) sorted by distance. Distance is
+            measured to the item rectangle (zero inside it).
+        :rtype: list
+
+        """
+        if not self._rects:
+            return []
+
+        size = self._cell_size
+        cells = self._cells  # alias
+        rects = self._rects  # alias
+        column = int(math.floor(x / size))
+        row = int(math.floor(y / size))
+        seen = set()
+        found = []
+
+        def visit(items):
+            for item in items:
+                if item in seen:
+                    continue
+                seen.add(item)
+                if accept and not accept(item):
+                    continue
+                r = rects[item]
+                dx = max(r[0] - x, 0, x - r[2])
+                dy = max(r[1] - y, 0, y - r[3])
+                distance = math.hypot(dx, dy)
+                if radius is None or distance <= radius:
+                    found.append((distance, item))
+
+        ring = 0
+        while True:
+            # Visit cells at the given ring
+            if ring == 0:
+                keys = [(column, row)]
+            else:
+                keys = []
+                for i in range(-ring, ring + 1):
+                    keys.append((column + i, row - ring))
+                    keys.append((column + i, row + ring))
+                for i in range(-ring + 1, ring):
+                    keys.append((column - ring, row + i))
+                    keys.append((column + ring, row + i))
+            for key in keys:
+                visit(cells.get(key, ()))
+
+            # Items in further rings are at least this far
+            reach = ring * size
+            found.sort(key=lambda f: f[0])
+            if len(found) >= k and found[k - 1][0] <= reach:
+                break
+            if radius is not None and reach > radius:
+                break
+            if len(seen) == len(rects):
+                break
+            ring += 1
+
+            # Searched square outgrows the occupied cells, scan what's left
+            if (2 * ring + 1) ** 2 > len(cells):
+                visit(rects)
+                found.sort(key=lambda f: f[0])
+                break
+
+        return found[:k]
+
+
+class Bounds(object):
+
+    """
+    Bounding rectangle of many rectangles, maintained incrementally.
+
+    Each side is tracked by a heap (min heaps for left and top, max heaps for
+    right and bottom). Updates push new entries in O(log n) and leave the
+    outdated ones in place, they are only discarded when they reach the top
+    of a heap. Heaps are rebuilt when outdated entries outnumber live ones.
+
+    """
+
+    def __init__(self):
+        """Create an instance of this class
+
+        """
+        self._rects = {}
+        self._stamps = {}
+        self._live = set()
+        self._heaps = ([], [], [], [])
+        self._stamp = 0
+
+    def __len__(self):
+        """Return number of rectangles
+
+        """
+        return len(self._rects)
+
+    def __contains__(self, item):
+        """Return True if item is part of the bounds
+
+        """
+        return item in self._rects
+
+    def update(self, item, rect):
+        """Update (or add) rectangle of an item
+
+        :param item: Any hashable object
+        :type item: object
+
+        :param rect: Rectangle as (left, top, right, bottom)
+        :type rect: tuple
+
+        """
+        if self._rects.get(item) == rect:
+            return
+        self._live.discard(self._stamps.get(item))
+
+        self._stamp += 1
+        stamp = self._stamp
+        self._rects[item] = rect
+        self._stamps[item] = stamp
+        self._live.add(stamp)
+
+        heaps = self._heaps  # alias
+        heapq.heappush(heaps[0], (rect[0], stamp))
+        heapq.heappush(heaps[1], (rect[1], stamp))
+        heapq.heappush(heaps[2], (-rect[2], stamp))
+        heapq.heappush(heaps[3], (-rect[3], stamp))
+
+        if len(heaps[0]) > 2 * len(self._live) + 64:
+            self._rebuild()
+
+    def remove(self, item):
+        """Remove rectangle of an item
+
+        :param item: An object part of the bounds
+        :type item: object
+
+        """
+        if item not in self._rects:
+            return
+        del self._rects[item]
+        self._live.discard(self._stamps.pop(item))
+
+    def clear(self):
+        """Remove all rectangles
+
+        """
+        self._rects.clear()
+        self._stamps.clear()
+        self._live.clear()
+        for heap in self._heaps:
+            del heap[:]
+
+    def _rebuild(self):
+        """Rebuild heaps from live rectangles only
+
+        """
+        heaps = ([], [], [], [])
+        for item, rect in self._rects.items():
+            stamp = self._stamps[item]
+            heaps[0].append((rect[0], stamp))
+            heaps[1].append((rect[1], stamp))
+            heaps[2].append((-rect[2], stamp))
+            heaps[3].append((-rect[3], stamp))
+        for heap in heaps:
+            heapq.heapify(heap)
+        self._heaps = heaps
+
+    def rect(self):
+        """Return bounding rectangle of all rectangles
+
+        :returns: Rectangle as (left, top, right, bottom) or None if empty
+        :rtype: tuple
+
+        """
+        if not self._rects:
+            return None
+
+        live = self._live  # alias
+        sides = []
+        for heap in self._heaps:
+            while heap[0][1] not in live:
+                heapq.heappop(heap)
+            sides.append(heap[0][0])
+        return sides[0], sides[1], -sides[2], -sides[3]
+
+
+def points_in_polygon(points, polygon):
+    """Test which points lie inside a polygon (even-odd rule)
+
+    Each polygon edge is tested against all points at once when numpy is
+    available.
+
+    :param points: Points as (x, y) tuples
+    :type points: list
+
+    :param polygon: Polygon vertices as (x, y) tuples
+    :type polygon: list
+
+    :returns: One boolean per point
+    :rtype: list
+
+    """
+    if not points or len(polygon) < 3:
+        return [False] * len(points)
+
+    if numpy is None:
+        result = []
+        for x, y in points:
+            inside = False
+            x1, y1 = polygon[-1]
+            for x2, y2 in polygon:
+                if (y1 > y) != (y2 > y):
+                    if x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                        inside = not inside
+                x1, y1 = x2, y2
+            result.append(inside)
+        return result
+
+    coords = numpy.asarray(points, dtype=float)
+    x = coords[:, 0]
+    y = coords[:, 1]
+    inside = numpy.zeros(len(coords), dtype=bool)
+    x1, y1 = polygon[-1]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        for x2, y2 in polygon:
+            crossing = (y1 > y) != (y2 > y)
+            if y1 != y2:
+                crossing &= x < x1 + (y - y1) * (x2 - x1) / float(y2 - y1)
+            inside ^= crossing
+            x1, y1 = x2, y2
+    return inside.tolist()
@@ -0,0 +1,200 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Tile cache of the rendered scene used to scroll static content without
+repainting every visible item
+
+"""
+import math
+from collections import OrderedDict
+
+from Qt import QtCore, QtGui
+
+
+class TileCache(object):
+
+    """
+    Keeps rendered tiles of a scene at a single view scale.
+
+    Tiles are laid out on a grid anchored at the scene origin, so they remain
+    valid while the view is translated. Tiles are rendered lazily when first
+    exposed, dropped when the scale changes and invalidated by the scene
+    changed regions while panning, or by the scene itself in between, so
+    that tiles of a previous pan are reused.
+
+    """
+
+    def __init__(self, scene, size=256, limit=512):
+        """Create an instance of this class
+
+        :param scene: Scene to render
+        :type scene: :class:`QtWidgets.QGraphicsScene`
+
+        :param size: Width and height of a tile in pixels
+        :type size: int
+
+        :param limit: Maximum number of tiles kept in memory
+        :type limit: int
+
+        """
+        self._scene = scene
+        self._size = size
+        self._limit = limit
+        self._scale = None
+        self._render_hints = QtGui.QPainter.Antialiasing
+        self._tiles = OrderedDict()
+
+    def __len__(self):
+        """Return number of cached tiles
+
+        """
+        return len(self._tiles)
+
+    @property
+    def render_hints(self):
+        """Return render hints used when rendering tiles
+
+        """
+        return self._render_hints
+
+    @render_hints.setter
+    def render_hints(self, value):
+        """Set render hints used when rendering tiles (clears the cache)
+
+        :type value: :class:`QtGui.QPainter.RenderHints`
+
+        """
+        self._render_hints = value
+        self.clear()
+
+    def clear(self):
+        """Drop all tiles
+
+        """
+        self._tiles.clear()
+
+    def _tile_range(self, rect):
+        """Return tile indices covering the given scene rectangle
+
+        :param rect: Rectangle in scene coordinates
+        :type rect: :class:`QtCore.QRectF`
+
+        :returns: Indices as (first column, last column, first row, last row)
+        :rtype: tuple
+
+        """
+        step = self._size / self._scale
+        return (int(math.floor(rect.left() / step)),
+                int(math.floor(rect.right() / step)),
+                int(math.floor(rect.top() / step)),
+                int(math.floor(rect.bottom() / step)))
+
+    def _tile_rect(self, column, row):
+        """Return scene rectangle covered by a tile
+
+        :rtype: :class:`QtCore.QRectF`
+
+        """
+        step = self._size / self._scale
+        return QtCore.QRectF(column * step, row * step, step, step)
+
+    def _render(self, column, row):
+        """Render a tile of the scene
+
+        :rtype: :class:`QtGui.QPixmap`
+
+        """
+        pixmap = QtGui.QPixmap(self._size, self._size)
+        painter = QtGui.QPainter(pixmap)
+        painter.setRenderHints(self._render_hints)
+        self._scene.render(painter,
+                           QtCore.QRectF(0, 0, self._size, self._size),
+                           self._tile_rect(column, row),
+                           QtCore.Qt.IgnoreAspectRatio)
+        painter.end()
+        return pixmap
+
+    def invalidate(self, rects):
+        """Drop tiles intersecting the given scene regions
+
+        Meant to be connected to :meth:`QtWidgets.QGraphicsScene.changed`
+
+        :param rects: Changed regions in scene coordinates
+        :type rects: list
+
+        """
+        for rect in rects:
+            self.discard((rect.left(), rect.top(),
+                          rect.right(), rect.bottom()))
+
+    def discard(self, rect):
+        """Drop tiles intersecting a scene rectangle, used to track changes
+        between pans
+
+        :param rect: Rectangle as (left, top, right, bottom)
+        :type rect: tuple
+
+        """
+        if not self._tiles:
+            return
+
+        # Antialiased outlines bleed a pixel out of the bounding boxes
+        margin = 2.0 / self._scale
+        step = self._size / self._scale
+        left = int(math.floor((rect[0] - margin) / step))
+        right = int(math.floor((rect[2] + margin) / step))
+        top = int(math.floor((rect[1] - margin) / step))
+        bottom = int(math.floor((rect[3] + margin) / step))
+        if (right - left + 1) * (bottom - top + 1) > len(self._tiles):
+            # Cheaper to test cached tiles than the whole region
+            for key in list(self._tiles):
+                if left <= key[0] <= right and top <= key[1] <= bottom:
+                    del self._tiles[key]
+        else:
+            for column in range(left, right + 1):
+                for row in range(top, bottom + 1):
+                    self._tiles.pop((column, row), None)
+
+    def paint(self, painter, rect, scale):
+        """Draw tiles covering the given scene rectangle, rendering the ones
+        that were never exposed
+
+        :param painter: Painter using the view transform
+        :type painter: :class:`QtGui.QPainter`
+
+        :param rect: Exposed rectangle in scene coordinates
+        :type rect: :class:`QtCore.QRectF`
+
+        :param scale: Current view scale
+        :type scale: float
+
+        """
+        if scale != self._scale:
+            self.clear()
+            self._scale = scale
+
+        tiles = self._tiles  # alias
+        left, right, top, bottom = self._tile_range(rect)
+        source = QtCore.QRectF(0, 0, self._size, self._size)
+        for column in range(left, right + 1):
+            for row in range(top, bottom + 1):
+                key = (column, row)
+                pixmap = tiles.pop(key, None)
+                if pixmap is None:
+                    pixmap = self._render(column, row)
+                tiles[key] = pixmap
+                painter.drawPixmap(self._tile_rect(column, row), pixmap,
+                                   source)
+
+        # Evict least recently drawn tiles
+        while len(tiles) > self._limit:
+            tiles.popitem(last=False)
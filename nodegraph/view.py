@@ -14,12 +14,15 @@
 """
 import os
 import random
+import bisect
 
 from Qt import QtCore, QtGui, QtWidgets
 # from . import QtOpenGL
 
 from .node import Node
-from .constant import SCENE_WIDTH, SCENE_HEIGHT
+from .tiles import TileCache
+from .constant import (SCENE_WIDTH, SCENE_HEIGHT, LOD_THRESHOLDS,
+                       DENSITY_THRESHOLD)
 
 RESOURCES = os.path.dirname(os.path.realpath(__file__))
 
@@ -31,6 +34,10 @@ class View(QtWidgets.QGraphicsView):
 
     """
 
+    # Margin around the visible area materialized in virtualized mode, as a
+    # ratio of the visible size
+    MATERIALIZE_MARGIN = 0.5
+
     def __init__(self, scene, parent=None):
         """Create an instance of this class
 
@@ -52,6 +59,11 @@ class View(QtWidgets.QGraphicsView):
         self._is_view_initialised = False
         self._is_pan = False
         self._is_zoom = False
+        self._is_tiled = False
+        self._tile_cache = TileCache(scene)
+        scene.add_tile_cache(self._tile_cache)
+        self._materialized_rect = None
+        self._is_density = False
 
         # Custom mouse cursors
         img = QtGui.QPixmap(
@@ -107,12 +119,11 @@ class View(QtWidgets.QGraphicsView):
 
         """
         # Resolve rectangle we want to zoom to
-        selection = self.scene().selectedItems()
-        if selected and selection:
-            scene_rect = self._get_selection_bbox(selection)
-        else:
-            scene_rect = self.scene().itemsBoundingRect()
-            # scene_rect = self.scene().get_nodes_bbox()
+        scene_rect = QtCore.QRectF()
+        if selected:
+            scene_rect = self.scene().get_selection_bbox()
+        if scene_rect.isNull():
+            scene_rect = self.scene().get_bbox()
 
         # Add a bit of padding
         scene_rect.adjust(-padding, -padding, padding, padding)
@@ -144,6 +155,19 @@ class View(QtWidgets.QGraphicsView):
             print("Fit en view")
             self.fitInView(scene_rect, QtCore.Qt.KeepAspectRatio)
 
+        self._update_lod()
+        self._update_materialized()
+
+    def center_view(self, pos):
+        """Center view on a scene position
+
+        :param pos: Scene position
+        :type pos: :class:`QtCore.QPointF`
+
+        """
+        self.centerOn(pos)
+        self._update_materialized()
+
     def translate_view(self, offset):
         """Translate view by the given offset
 
@@ -151,9 +175,12 @@ class View(QtWidgets.QGraphicsView):
         :type offset: :class:`QtCore.QPointF`
 
         """
+        # Blit cached tiles while panning
+        self._start_tiles()
         self.setInteractive(False)
         self.translate(offset.x(), offset.y())
-        self.setInteractive(True)
+        self.setInteractive(not self._is_density)
+        self._update_materialized()
 
     def scale_view(self, scale_factor, limits=True):
         """Scale the view with upper and lower limits if True
@@ -171,6 +198,8 @@ class View(QtWidgets.QGraphicsView):
             if new_scale >= 1.0:
                 self._scale = 1
                 self.resetTransform()
+                self._update_lod()
+                self._update_materialized()
                 return False
             elif new_scale < 0.1:
                 scale_factor = new_scale = 0.1
@@ -180,9 +209,53 @@ class View(QtWidgets.QGraphicsView):
         self._scale = new_scale
         self.setInteractive(False)
         self.scale(scale_factor, scale_factor)
-        self.setInteractive(True)
+        self.setInteractive(not self._is_density)
+        self._update_lod()
+        self._update_materialized()
         return True
 
+    def _update_lod(self):
+        """Resolve level of detail tier from the current transform and
+        broadcast it to the scene items when it changes
+
+        """
+        scale = self.transform().m11()
+        lod = bisect.bisect_right(LOD_THRESHOLDS, scale)
+        if lod != self.scene().lod:
+            self.scene().set_lod(lod)
+
+        # Switch to (or from) density map, items can't be hit while hidden
+        is_density = scale < DENSITY_THRESHOLD
+        if is_density != self._is_density:
+            self._is_density = is_density
+            self._materialized_rect = None
+            self.setInteractive(not is_density)
+            self.viewport().update()
+
+    def _update_materialized(self):
+        """Materialize scene items around the visible area when the scene is
+        virtualized. Nothing is done while the visible area stays within the
+        previously materialized one (unless that one got much larger after
+        zooming in), so panning only materializes items once in a while.
+
+        """
+        scene = self.scene()  # alias
+        if scene.model is None or self._is_density:
+            return
+
+        visible = self.mapToScene(self.viewport().rect()).boundingRect()
+        area = visible.width() * visible.height()
+        rect = self._materialized_rect
+        if (rect is not None and rect.contains(visible) and
+                rect.width() * rect.height() <= 9 * area):
+            return
+
+        margin_x = visible.width() * self.MATERIALIZE_MARGIN
+        margin_y = visible.height() * self.MATERIALIZE_MARGIN
+        self._materialized_rect = visible.adjusted(-margin_x, -margin_y,
+                                                   margin_x, margin_y)
+        scene.materialize(self._materialized_rect)
+
     def keyPressEvent(self, event):
         """Re-implement keyPressEvent from base class
 
@@ -196,7 +269,6 @@ class View(QtWidgets.QGraphicsView):
             print("P# ALT ON")
             self.scene()._is_alt_key = True
             self._is_pan = True
-            self.setRenderHint(QtGui.QPainter.Antialiasing, False)
             self.setCursor(QtCore.Qt.OpenHandCursor)
 
         if modifiers & QtCore.Qt.ControlModifier:
@@ -228,6 +300,16 @@ class View(QtWidgets.QGraphicsView):
             self.fit_view(selected=True)
         if event.text() in ["a"]:
             self.fit_view(selected=False)
+        if event.text() in ["l"]:
+            self.scene().is_lasso = not self.scene().is_lasso
+        if event.text() in ["g"]:
+            self.scene().collapse_selection()
+        if event.text() in ["u"]:
+            for node in self.scene().selectedItems():
+                if isinstance(node, Node) and self.scene().is_group(node):
+                    self.scene().expand_group(node)
+        if event.text() in ["b"]:
+            self.scene().create_backdrop("backdrop")
         # if event.text() in ['t']:
         #     items = self.scene().selectedItems()
         #     for item in items:
@@ -242,13 +324,11 @@ class View(QtWidgets.QGraphicsView):
         if event.text() in ['o']:
             for node in self.scene().selectedItems():
                 if isinstance(node, Node):
-                    node._height -= 10
-                    node.refresh()
+                    node.set_height(node._height - 10)
         if event.text() in ['p']:
             for node in self.scene().selectedItems():
                 if isinstance(node, Node):
-                    node._height += 10
-                    node.refresh()
+                    node.set_height(node._height + 10)
         if event.text() in ['s']:
             print(self._scale)
         else:
@@ -277,7 +357,7 @@ class View(QtWidgets.QGraphicsView):
 
             if not self.scene()._is_mid_mouse:
                 self._is_pan = False
-                self.setRenderHint(QtGui.QPainter.Antialiasing, True)
+                self._stop_tiles()
                 self.setCursor(QtCore.Qt.ArrowCursor)
 
         if self.scene()._is_shift_key:
@@ -356,6 +436,7 @@ class View(QtWidgets.QGraphicsView):
         # Update mode
         if self._is_pan:
             self._is_pan = False
+            self._stop_tiles()
 
         # Update mouse icon
         if scene._is_alt_key:
@@ -398,6 +479,16 @@ class View(QtWidgets.QGraphicsView):
             self.fit_view()
         QtWidgets.QGraphicsView.showEvent(self, event)
 
+    def resizeEvent(self, event):
+        """Re-implement resizeEvent from base class
+
+        :param event: Resize event
+        :type event: :class:`QtGui.QResizeEvent`
+
+        """
+        QtWidgets.QGraphicsView.resizeEvent(self, event)
+        self._update_materialized()
+
     def focusOutEvent(self, event):
         """Re-implement focusOutEvent from the base class
 
@@ -412,11 +503,85 @@ class View(QtWidgets.QGraphicsView):
         # Stop dragging mode if needed
         self.scene()._is_alt_key = False
         self._is_pan = False
-        self.setRenderHint(QtGui.QPainter.Antialiasing, True)
+        self._stop_tiles()
         self.setCursor(QtCore.Qt.ArrowCursor)
 
         QtWidgets.QGraphicsView.focusOutEvent(self, event)
 
+    def paintEvent(self, event):
+        """Re-implement paintEvent from base class
+
+        While panning, the exposed area is drawn from the tile cache so that
+        only newly exposed tiles are rendered
+
+        :param event: Paint event
+        :type event: :class:`QtGui.QPaintEvent`
+
+        """
+        if self._is_density:
+            return self._paint_density(event)
+        if not self._is_tiled:
+            # Partial repaints come from item updates, tiles under them are
+            # stale (full repaints follow scrolling, zooming or resizing)
+            if event.rect() != self.viewport().rect():
+                self._tile_cache.invalidate(
+                    [self.mapToScene(event.rect()).boundingRect()])
+            return QtWidgets.QGraphicsView.paintEvent(self, event)
+
+        painter = QtGui.QPainter(self.viewport())
+        painter.setTransform(self.viewportTransform())
+        rect = self.mapToScene(event.rect()).boundingRect()
+        self._tile_cache.paint(painter, rect, self.transform().m11())
+        painter.end()
+
+    def _paint_density(self, event):
+        """Draw the node density map and its cluster labels instead of the
+        scene items, at a cost independent of the number of nodes
+
+        :param event: Paint event
+        :type event: :class:`QtGui.QPaintEvent`
+
+        """
+        scene = self.scene()  # alias
+        density = scene.density  # alias
+        painter = QtGui.QPainter(self.viewport())
+        painter.fillRect(event.rect(), scene.backgroundBrush())
+
+        image = density.image()
+        if image is not None:
+            painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+            painter.setTransform(self.viewportTransform())
+            painter.drawImage(density.rect(), image)
+            painter.resetTransform()
+
+            # Cluster labels keep their size on screen
+            painter.setPen(scene.palette().text().color())
+            for pos, count in density.clusters():
+                painter.drawText(self.mapFromScene(pos), "%d" % count)
+        painter.end()
+
+    def _start_tiles(self):
+        """Draw the view from the tile cache until the pan stops
+
+        :meth:`QtWidgets.QGraphicsScene.changed` is only listened to while
+        panning, since it slows down every item update. In between, the scene
+        and partial repaints drop tiles under changed items, so tiles rendered
+        during previous pans are reused.
+
+        """
+        if not self._is_tiled:
+            self._is_tiled = True
+            self.scene().changed.connect(self._tile_cache.invalidate)
+
+    def _stop_tiles(self):
+        """Go back to regular item painting after a pan
+
+        """
+        if self._is_tiled:
+            self._is_tiled = False
+            self.scene().changed.disconnect(self._tile_cache.invalidate)
+            self.viewport().update()
+
     # def focusInEvent(self, event):
     #     """Re-implement focusInEvent from the base class
 
@@ -435,26 +600,3 @@ class View(QtWidgets.QGraphicsView):
     #         self.setCursor(QtCore.Qt.OpenHandCursor)
 
     #     QtWidgets.QGraphicsView.focusOutEvent(self, event)
-
-    def _get_selection_bbox(self, selection):
-        """For a given selection of node return the bounding box
-
-        :param selection: List of graphics item
-        :type selection: List
-
-        :returns: A Qt rectangle
-        :rtype: :class:`QtCore.QRectF`
-
-        """
-        top_left = QtCore.QPointF(self._width, self._height)
-        bottom_right = QtCore.QPointF(- self._width, - self._height)
-
-        for node in [s for s in selection if isinstance(s, Node)]:
-            bbox = node.boundingRect()
-            top_left.setX(min(node.x() + bbox.left(), top_left.x()))
-            top_left.setY(min(node.y() + bbox.top(), top_left.y()))
-            bottom_right.setX(max(node.x() + bbox.right(),
-                              bottom_right.x()))
-            bottom_right.setY(max(node.y() + bbox.bottom(),
-                              bottom_right.y()))
-        return QtCore.QRectF(top_left, bottom_right)
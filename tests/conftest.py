@@ -0,0 +1,52 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Shared fixtures, tests are skipped when no Qt binding is available
+
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Same lookup paths as the demo scripts (Qt.py and implicit imports)
+for path in [os.path.join(ROOT, "nodegraph"),
+             os.path.join(ROOT, "thirdparty"),
+             ROOT]:
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture(scope="session")
+def app():
+    """Return the application, created once
+
+    """
+    try:
+        import Qt
+    except ImportError as error:
+        pytest.skip(str(error))
+    application = Qt.QtWidgets.QApplication.instance()
+    if application is None:
+        application = Qt.QtWidgets.QApplication([])
+    return application
+
+
+@pytest.fixture
+def scene(app):
+    """Return an empty scene
+
+    """
+    from nodegraph.scene import Scene
+    return Scene()
@@ -0,0 +1,58 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Density maps of virtualized scenes
+
+"""
+
+
+def test_density_follows_model_filled_after_virtualize(scene):
+    from nodegraph.model import GraphModel
+
+    model = GraphModel()
+    scene.virtualize(model)
+    edges = scene.edge_density
+    prev_name = None
+    for i in range(200):
+        name = "node%d" % i
+        model.add_node(name, ["in"], (i % 20) * 350, (i // 20) * 350)
+        if prev_name:
+            model.add_edge(prev_name, name, "in")
+        prev_name = name
+
+    assert len(scene.density) == 200
+    assert sum(scene.density.counts.values()) == 200
+    assert sum(edges.counts.values()) == 199
+    assert scene.density.clusters()
+
+    # Incremental updates
+    model.move_node("node1", 50000, 50000)
+    assert sum(scene.density.counts.values()) == 200
+    model.remove_node("node0")
+    assert sum(scene.density.counts.values()) == 199
+    assert sum(edges.counts.values()) == 198
+
+
+def test_density_bins_node_centers(scene):
+    from nodegraph.model import GraphModel
+
+    node = scene.create_node("node")
+    node.setPos(100, 200)
+    center = node.sceneBoundingRect().center()
+    assert scene.density._positions["node"] == (center.x(), center.y())
+
+    model = GraphModel(node_size=(180, 140))
+    model.add_node("record", x=100, y=200)
+    scene.virtualize(model)
+    assert scene.density._positions["record"] == (190, 270)
+    model.move_node("record", 0, 0)
+    assert scene.density._positions["record"] == (90, 70)
@@ -0,0 +1,55 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Batch refresh of edges
+
+"""
+import pytest
+
+from nodegraph.edge import BATCH_MIN, refresh_edges
+
+
+def _geometry(edge):
+    pos = edge.scenePos()
+    return ((pos.x(), pos.y()) + edge.boundingRect().getRect() +
+            edge.shape().boundingRect().getRect())
+
+
+def test_batch_refresh_matches_single_refresh(scene):
+    sources = []
+    edges = []
+    for i in range(BATCH_MIN + 8):
+        source = scene.create_node("source%d" % i)
+        target = scene.create_node("target%d" % i, inputs=["in"])
+        target.setPos(300, i * 100)
+        sources.append(source)
+        edges.append(scene.create_edge(source._output, target._inputs[0]))
+
+    for i, source in enumerate(sources):
+        source.setPos(-100, i * 50)
+        source.update_slot_centers()
+    refresh_edges(edges)
+    batched = [_geometry(e) for e in edges]
+    for edge in edges:
+        edge.refresh()
+    for batch, single in zip(batched, [_geometry(e) for e in edges]):
+        assert batch == pytest.approx(single)
+
+    # Edges which slots didn't move are left untouched
+    refresh_edges(edges)
+    bboxes = [e.boundingRect() for e in edges]
+    sources[0].setPos(-200, 0)
+    sources[0].update_slot_centers()
+    refresh_edges(edges)
+    assert edges[0].boundingRect() is not bboxes[0]
+    assert all(e.boundingRect() is b for e, b in zip(edges[1:], bboxes[1:]))
+    assert scene.index_rect(edges[0])[0] < 0
@@ -0,0 +1,40 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Headless graph model
+
+"""
+from nodegraph.model import GraphModel
+
+
+def test_long_edges_stay_out_of_the_grid():
+    model = GraphModel(cell_size=1000)
+    near = model.add_node("near", x=0, y=0)
+    far = model.add_node("far", x=50000, y=0)
+    model.add_node("other", x=20000, y=5000)
+    edge = model.add_edge("near", "far", "in")
+    assert edge not in model._edge_index
+    assert sum(len(c) for c in model._edge_index._cells.values()) == 0
+
+    # Still found by rectangles it crosses, away from both ends
+    assert model.query((20000, -100, 21000, 100)) == set([near, far])
+    assert model.query((20000, 4000, 21000, 6000)) == \
+        set([model.node("other")])
+
+    # Back in the grid once short, out of both once removed
+    model.move_node("far", 1000, 0)
+    assert edge in model._edge_index
+    assert not model._long_edges
+    model.move_node("far", 50000, 0)
+    model.remove_node("far")
+    assert not model._long_edges
+    assert edge not in model._edge_index
@@ -0,0 +1,114 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Node and edge life cycle in the scene
+
+"""
+from Qt import QtCore
+
+
+def test_reused_node_starts_like_a_new_one(scene):
+    node = scene.create_node("moved")
+    node.setPos(500, 300)
+    node.setZValue(5)
+    node.setOpacity(0)
+    node.setSelected(True)
+    scene.delete_node(node)
+
+    reused = scene.create_node("new")
+    assert reused is node
+    assert scene.pool.stats["reused"] == 1
+    assert (reused.pos().x(), reused.pos().y()) == (0, 0)
+    assert reused.zValue() == 0
+    assert reused.opacity() == 1
+    assert not reused.isSelected()
+    assert scene.nodes == [reused]
+
+    # Indexed at its new position
+    left, top, right, bottom = scene.index_rect(reused)
+    assert left <= 0 <= right and top <= 0 <= bottom
+
+
+def test_deleting_nodes_only_updates_surviving_inputs(scene):
+    source = scene.create_node("source")
+    merge = scene.create_node("merge", type="merge")
+    target = scene.create_node("target", type="merge")
+    scene.create_edge(source._output, merge._inputs[0])
+    scene.create_edge(merge._output, target._inputs[0])
+    scene.create_edge(source._output, target._inputs[1])
+    assert len(target._inputs) == 3
+
+    scene.delete_nodes([source, merge])
+    assert scene.nodes == [target]
+    assert not scene.edges_by_hash
+    assert len(target._inputs) == 1
+
+
+def test_height_is_a_minimum_of_variable_input_nodes(scene):
+    merge = scene.create_node("merge", type="merge")
+    height = merge._height
+    merge.set_height(height + 100)
+    assert merge._height == height + 100
+
+    # Inputs still fit once the requested height is too small
+    merge.set_height(10)
+    assert merge._height > 10
+    assert merge._inputs[-1]._rect.bottom() <= merge._height
+
+
+def test_expanded_group_follows_group_and_keeps_names_unique(scene):
+    first = scene.create_node("first")
+    second = scene.create_node("second")
+    second.setPos(400, 0)
+    scene.create_edge(first._output, second._inputs[0])
+    scene.update_selection([first, second])
+
+    group = scene.collapse_selection()
+    group.setPos(group.pos().x() + 1000, group.pos().y() + 500)
+    clash = scene.create_node("first")
+    clash.setPos(-3000, 0)
+
+    nodes = scene.expand_group(group)
+    names = sorted(n.name for n in nodes)
+    assert names == ["first_1", "second"]
+    assert scene.nodes.count(clash) == 1
+    positions = sorted((n.pos().x(), n.pos().y()) for n in nodes)
+    assert positions == [(1000, 500), (1400, 500)]
+    assert len(scene.edges_by_hash) == 1
+
+
+def test_backdrop_nodes_stack_above_edges_and_below_free_nodes(scene):
+    left = scene.create_node("left")
+    right = scene.create_node("right")
+    left.setPos(-600, 0)
+    right.setPos(900, 0)
+    edge = scene.create_edge(left._output, right._inputs[0])
+    inside = scene.create_node("inside")
+    inside.setPos(200, 0)
+    backdrop = scene.create_backdrop("backdrop", QtCore.QRectF(100, -100,
+                                                               500, 400))
+    assert backdrop.nodes == [inside]
+
+    # Qt paints the node over the edge crossing the backdrop
+    y = edge.sceneBoundingRect().center().y()
+    pos = QtCore.QPointF(inside.sceneBoundingRect().center().x(), y)
+    items = scene.items(pos)
+    assert items.index(inside) < items.index(edge) < items.index(backdrop)
+
+    # A free node dropped over it stays on top
+    free = scene.create_node("free")
+    free.setPos(220, 10)
+    assert scene.items_at(pos)[:2] == [free, inside]
+
+    # Content follows the backdrop
+    backdrop.setPos(backdrop.pos() + QtCore.QPointF(50, 0))
+    assert inside.scenePos().x() == 250
@@ -0,0 +1,54 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Nearest item queries of the grid index
+
+"""
+import math
+import random
+
+from nodegraph.spatial import GridIndex
+
+
+def _brute_force(rects, x, y, k, radius=None, accept=None):
+    found = []
+    for item, r in rects.items():
+        if accept and not accept(item):
+            continue
+        distance = math.hypot(max(r[0] - x, 0, x - r[2]),
+                              max(r[1] - y, 0, y - r[3]))
+        if radius is None or distance <= radius:
+            found.append(distance)
+    return sorted(found)[:k]
+
+
+def test_nearest_matches_brute_force_and_far_items():
+    rng = random.Random(4)
+    index = GridIndex()
+    rects = {}
+    for i in range(300):
+        x, y = rng.uniform(0, 5000), rng.uniform(0, 5000)
+        rects[i] = (x, y, x + 160, y + 60)
+    rects["far"] = (1e6, 1e6, 1e6 + 160, 1e6 + 60)
+    for item, rect in rects.items():
+        index.insert(item, rect)
+
+    for _ in range(20):
+        x, y = rng.uniform(-1000, 6000), rng.uniform(-1000, 6000)
+        for k, radius in ((1, None), (5, None), (3, 300.0)):
+            found = [d for d, i in index.nearest(x, y, k, radius)]
+            assert found == _brute_force(rects, x, y, k, radius)
+
+    # Far (or only accepted) items are found without walking every ring
+    assert index.nearest(9e5, 9e5)[0][1] == "far"
+    accept = lambda i: i == "far"
+    assert index.nearest(0, 0, accept=accept)[0][1] == "far"
@@ -0,0 +1,50 @@
+# =============================================================================
+# Nodegraph-pyqt
+#
+# Everyone is permitted to copy and distribute verbatim copies of this
+# document, but changing it is not allowed without permissions.
+#
+# For any questions, please contact: dsideb@gmail.com
+#
+# GNU LESSER GENERAL PUBLIC LICENSE (Version 3, 29 June 2007)
+# =============================================================================
+
+"""
+Tile cache kept between pans
+
+"""
+from Qt import QtCore, QtGui
+
+from nodegraph.tiles import TileCache
+
+
+def test_tiles_are_only_dropped_under_changed_items(scene):
+    near = scene.create_node("near")
+    far = scene.create_node("far")
+    far.setPos(2000, 0)
+    cache = TileCache(scene)
+    scene.add_tile_cache(cache)
+
+    # Render tiles of two distant areas
+    pixmap = QtGui.QPixmap(16, 16)
+    painter = QtGui.QPainter(pixmap)
+    cache.paint(painter, QtCore.QRectF(0, 0, 500, 200), 1.0)
+    cache.paint(painter, QtCore.QRectF(2000, 0, 500, 200), 1.0)
+    painter.end()
+    count = len(cache._tiles)
+
+    # Moving a node only drops tiles under its old and new position
+    far.setPos(2100, 0)
+    assert (0, 0) in cache._tiles
+    assert (8, 0) not in cache._tiles
+    assert len(cache._tiles) < count
+
+    # So does selecting and deleting
+    near.setSelected(True)
+    assert (0, 0) not in cache._tiles
+    cache.clear()
+    painter = QtGui.QPainter(pixmap)
+    cache.paint(painter, QtCore.QRectF(2000, 0, 500, 200), 1.0)
+    painter.end()
+    scene.delete_node(far)
+    assert (8, 0) not in cache._tiles